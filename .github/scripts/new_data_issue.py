@@ -1,14 +1,37 @@
 import os
 import re
+import sys
+import json
+import fcntl
+import argparse
+from contextlib import contextmanager
 
-def save_data_file(title, content):
-    if "[NEW-PREDICTION]" in title:
-        base_directory = "data/posts"
-    elif "[NEW-AUTHOR]" in title:
-        base_directory = "data/authors"
-    else:
-        raise ValueError("Title format error")
+# last allocated id per kind; committed together with the new files, so the
+# next run allocates without listing the data tree
+IDS_PATH = "data/ids.json"
+LOCK_PATH = "data/ids.json.lock"
+
+KINDS = {
+    "[NEW-PREDICTION]": ("posts", "data/posts"),
+    "[NEW-AUTHOR]": ("authors", "data/authors"),
+}
+
+
+def thousand_bucket(n):
+    if n % 1000 == 0:
+        return n
+    return (n // 1000 + 1) * 1000
+
+
+def kind_of(title):
+    for tag, kind in KINDS.items():
+        if tag in title:
+            return kind
+    raise ValueError("Title format error")
 
+
+def scan_max_id(base_directory):
+    # only used when data/ids.json is missing or has no entry for the kind
     max_number = 0
     for subdir in os.listdir(base_directory):
         if subdir.endswith('000') and subdir.isdigit():
@@ -18,23 +41,97 @@ def save_data_file(title, content):
                     match = re.match(r'^(\d+)\.md$', filename)
                     if match:
                         max_number = max(max_number, int(match.group(1)))
+    return max_number
+
+
+def data_path(base_directory, number):
+    return os.path.join(base_directory, str(thousand_bucket(number)), f"{number}.md")
+
+
+@contextmanager
+def locked_ids():
+    # serializes allocations on this machine; runs on different machines are
+    # serialized by the workflow's concurrency group, and a push of the same
+    # ids.json change from a stale checkout fails instead of reusing ids
+    with open(LOCK_PATH, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                with open(IDS_PATH, 'r', encoding='utf-8') as f:
+                    ids = json.load(f)
+            except FileNotFoundError:
+                ids = {}
+            yield ids
+            tmp_path = f"{IDS_PATH}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(ids, f, indent=1, sort_keys=True)
+                f.write("\n")
+            os.replace(tmp_path, IDS_PATH)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
 
-    new_number = max_number + 1
-    
-    target_dir = str((new_number // 1000 + 1) * 1000)
-    full_target_path = os.path.join(base_directory, target_dir)
-    
-    os.makedirs(full_target_path, exist_ok=True)
-    
-    new_filename = f"{new_number}.md"
-    new_file_path = os.path.join(full_target_path, new_filename)
-    
-    with open(new_file_path, 'w', encoding='utf-8') as f:
+def allocate_id(ids, key, base_directory):
+    if key not in ids:
+        ids[key] = scan_max_id(base_directory)
+    number = ids[key] + 1
+    # files added by hand without updating the counter are stepped over
+    while os.path.exists(data_path(base_directory, number)):
+        number += 1
+    ids[key] = number
+    return number
+
+
+def write_data_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
         f.write(content)
-    
-#
-issue_title = os.environ.get('ISSUE_TITLE', '')
-issue_body = os.environ.get('ISSUE_BODY', '')
 
-save_data_file(issue_title, issue_body)
 
+def save_data_files(issues):
+    """issues: [(title, body)]; all ids are allocated under one lock.
+    Returns the written paths in input order."""
+    kinds = [kind_of(title) for title, _ in issues]
+    paths = []
+    with locked_ids() as ids:
+        for (key, base_directory), (_, content) in zip(kinds, issues):
+            path = data_path(base_directory, allocate_id(ids, key, base_directory))
+            write_data_file(path, content)
+            paths.append(path)
+    return paths
+
+
+def save_data_file(title, content):
+    return save_data_files([(title, content)])[0]
+
+
+def read_batch(path):
+    # one issue per line: {"title": ..., "body": ...}, as exported by
+    # gh issue list --json title,body --jq '.[]'
+    issues = []
+    with (sys.stdin if path == "-" else open(path, 'r', encoding='utf-8')) as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                issues.append((item["title"], item["body"]))
+            except (ValueError, KeyError) as e:
+                raise ValueError(f"{path}:{lineno}: expected a JSON object with title and body ({e})")
+    return issues
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Save new prediction/author issues as data files")
+    parser.add_argument("--batch", metavar="JSONL", help="ingest every issue in a JSONL file (- for stdin) instead of ISSUE_TITLE/ISSUE_BODY")
+    args = parser.parse_args()
+    if args.batch:
+        issues = read_batch(args.batch)
+    else:
+        issues = [(os.environ.get('ISSUE_TITLE', ''), os.environ.get('ISSUE_BODY', ''))]
+    for path in save_data_files(issues):
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
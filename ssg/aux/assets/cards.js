@@ -0,0 +1,59 @@
+// Post cards rendered in the browser, shared by feed.js and search.js. Card
+// fields come from the per-language post store (/{lang}/store/{bucket}.json,
+// one file per thousand ids); store values are escaped at build time.
+const Cards = (() => {
+    const stores = {};
+
+    function bucket(id) {
+        const n = Number(id);
+        return n % 1000 === 0 ? n : (Math.floor(n / 1000) + 1) * 1000;
+    }
+
+    function getJSON(url) {
+        return fetch(url).then(response => {
+            if (!response.ok) throw new Error('404');
+            return response.json();
+        });
+    }
+
+    function store(lang, b) {
+        const key = `${lang}/${b}`;
+        if (!stores[key]) {
+            stores[key] = getJSON(`/${lang}/store/${b}.json`).catch(error => {
+                delete stores[key];
+                throw error;
+            });
+        }
+        return stores[key];
+    }
+
+    function load(lang, ids) {
+        const buckets = [...new Set(ids.map(bucket))];
+        return Promise.all(buckets.map(b => store(lang, b))).then(loaded => Object.assign({}, ...loaded));
+    }
+
+    // same markup as render_post_item in ssg/generator.py
+    function card(cfg, id, p) {
+        const parts = [];
+        parts.push('<hgroup>');
+        parts.push(`<h4><a href='/${cfg.lang}/${p.a}'>${p.n}</a></h4>`);
+        parts.push(`<p><time datetime='${p.t}'>${p.d}</time> ${p.l}</p>`);
+        parts.push('</hgroup>');
+        parts.push(`<p>${p.s}`);
+        if (p.c !== '') {
+            parts.push(`<span class='g2'>(${p.c})</span>`);
+        }
+        parts.push('</p>');
+        const color = cfg.colors[p.st];
+        parts.push(`<small class='badge ${color}'>${cfg.labels[p.st]}</small>`);
+        if (cfg.rsf === 'awaiting' && p.st === 'awaiting' && p.aw !== '') {
+            parts.push(`<small class='badge ${color}'>${p.aw}</small>`);
+        } else if (cfg.rsf === 'verified' && p.st !== 'awaiting' && p.vf !== '') {
+            parts.push(`<small class='badge ${color}'>${p.vf}</small>`);
+        }
+        parts.push(`<a class='linka' href='/${cfg.lang}/${p.a}/${id}'></a>`);
+        return '<article>' + parts.join('\n') + '</article>';
+    }
+
+    return { getJSON, load, card };
+})();
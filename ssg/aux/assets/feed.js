@@ -0,0 +1,33 @@
+// Infinite scroll for feeds built with --json-feeds: page N is a list of post
+// ids (/feed/{rsf}/{N}.json, or {cfg.feed}/{N}.json for an author's listing;
+// with --archive-feeds pages are named by cfg.names instead of numbered) and
+// the cards are rendered by cards.js.
+document.addEventListener('DOMContentLoaded', () => {
+    const cfg = JSON.parse(document.getElementById('feed-config').textContent);
+    const feed = cfg.feed || `/feed/${cfg.rsf}`;
+    const names = cfg.names || Array.from({length: cfg.pages}, (_, i) => i + 1);
+    let currentPage = 1;
+    let flag = true;
+
+    function nextPage() {
+        return Cards.getJSON(`${feed}/${names[currentPage]}.json`).then(ids =>
+            Cards.load(cfg.lang, ids).then(posts =>
+                ids.filter(id => id in posts).map(id => Cards.card(cfg, id, posts[id])).join('\n')));
+    }
+
+    window.addEventListener('scroll', () => {
+        if (window.innerHeight*3.0 + window.scrollY >= document.documentElement.scrollHeight && currentPage < cfg.pages && flag) {
+            flag = false;
+            nextPage()
+                .then(html => {
+                    document.getElementById('abc').insertAdjacentHTML('beforeend', html);
+                    currentPage++;
+                    flag = true;
+                })
+                .catch(error => {
+                    console.log(error);
+                    flag = true;
+                });
+        }
+    });
+});
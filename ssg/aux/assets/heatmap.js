@@ -0,0 +1,21 @@
+// Expands the packed author heatmap written by render_heatmap in
+// ssg/generator.py: data-hm has one color code per post and data-ids the
+// post ids as base-36 deltas, both in heatmap order.
+document.addEventListener('DOMContentLoaded', () => {
+    const colors = {p: 'p', r: 'rh', g: 'g', '-': ''};
+    const lang = document.documentElement.lang;
+    for (const el of document.querySelectorAll('.heatmap[data-hm]')) {
+        const codes = el.dataset.hm;
+        const deltas = el.dataset.ids.split(',');
+        const cells = document.createDocumentFragment();
+        let id = 0;
+        for (let i = 0; i < codes.length; i++) {
+            id += parseInt(deltas[i], 36);
+            const a = document.createElement('a');
+            a.className = `hmc ${colors[codes[i]]}`;
+            a.href = `/${lang}/${el.dataset.author}/${id}`;
+            cells.appendChild(a);
+        }
+        el.appendChild(cells);
+    }
+});
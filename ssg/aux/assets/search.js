@@ -0,0 +1,90 @@
+// Client-side search over the sharded index built with --search. A term's
+// shard is /search/{hex codes of its first two characters}.json and maps
+// each term to its post ids, delta-encoded; query words match term prefixes
+// and all words must match. Cards are rendered by cards.js.
+document.addEventListener('DOMContentLoaded', () => {
+    const cfg = JSON.parse(document.getElementById('feed-config').textContent);
+    const input = document.getElementById('search-q');
+    const out = document.getElementById('search-results');
+    const shards = {};
+    const limit = 100;
+    let seq = 0;
+    let timer = null;
+
+    // same normalization as search_terms in ssg/generator.py
+    function tokens(q) {
+        const words = q.toLowerCase().replace(/ё/g, 'е').match(/[\p{L}\p{N}]+/gu) || [];
+        return [...new Set(words.filter(t => t.length >= 2))];
+    }
+
+    function shardName(term) {
+        return [...term.slice(0, 2)].map(c => c.codePointAt(0).toString(16)).join('-');
+    }
+
+    function shard(name) {
+        if (!shards[name]) {
+            // a missing shard means no indexed term has this prefix
+            shards[name] = Cards.getJSON(`/search/${name}.json`).catch(() => ({}));
+        }
+        return shards[name];
+    }
+
+    function lookup(word) {
+        return shard(shardName(word)).then(terms => {
+            const ids = new Set();
+            for (const term in terms) {
+                if (term.startsWith(word)) {
+                    let id = 0;
+                    for (const d of terms[term]) {
+                        id += d;
+                        ids.add(id);
+                    }
+                }
+            }
+            return ids;
+        });
+    }
+
+    function search(q) {
+        const words = tokens(q);
+        if (!words.length) return Promise.resolve(null);
+        return Promise.all(words.map(lookup)).then(sets =>
+            [...sets[0]].filter(id => sets.every(s => s.has(id))).sort((a, b) => b - a));
+    }
+
+    function run() {
+        const q = input.value.trim();
+        const current = ++seq;
+        history.replaceState(null, '', q ? `?q=${encodeURIComponent(q)}` : location.pathname);
+        search(q)
+            .then(ids => {
+                if (ids === null) {
+                    if (current === seq) out.innerHTML = '';
+                    return;
+                }
+                const shown = ids.slice(0, limit).map(String);
+                return Cards.load(cfg.lang, shown).then(posts => {
+                    if (current !== seq) return;
+                    const cards = shown.filter(id => id in posts).map(id => Cards.card(cfg, id, posts[id]));
+                    out.innerHTML = `<p>${cfg.found} ${ids.length}</p>` + cards.join('\n');
+                });
+            })
+            .catch(error => console.log(error));
+    }
+
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(run, 200);
+    });
+    document.getElementById('search-form').addEventListener('submit', event => {
+        event.preventDefault();
+        clearTimeout(timer);
+        run();
+    });
+
+    const q = new URLSearchParams(location.search).get('q');
+    if (q) {
+        input.value = q;
+        run();
+    }
+});
@@ -0,0 +1,70 @@
+// Service worker written to /sw.js by builds with --service-worker. PRECACHE
+// (URL -> content hash) is filled in by the build: those assets are cached on
+// install and served cache-first, and an entry is fetched again only when its
+// hash changes. Pages, feed fragments and JSON shards are served
+// stale-while-revalidate from a bounded runtime cache.
+const PRECACHE = __PRECACHE__;
+const PRECACHE_NAME = 'precache';
+const RUNTIME_NAME = 'runtime';
+const RUNTIME_MAX_ENTRIES = 500;
+
+// the cache key carries the hash, so a changed asset gets a new key and the
+// old one is dropped on activate
+function precacheKey(url) {
+    const key = new URL(url, self.location.origin);
+    key.searchParams.set('__sw', PRECACHE[url]);
+    return key.href;
+}
+
+self.addEventListener('install', event => {
+    event.waitUntil(caches.open(PRECACHE_NAME).then(cache =>
+        Promise.all(Object.keys(PRECACHE).map(url => {
+            const key = precacheKey(url);
+            return cache.match(key).then(hit => hit || fetch(url, {cache: 'reload'}).then(response => {
+                if (!response.ok) throw new Error(`${url}: ${response.status}`);
+                return cache.put(key, response);
+            }));
+        }))).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+    const keys = new Set(Object.keys(PRECACHE).map(precacheKey));
+    event.waitUntil(caches.open(PRECACHE_NAME).then(cache =>
+        cache.keys().then(requests => Promise.all(
+            requests.filter(request => !keys.has(request.url)).map(request => cache.delete(request)))))
+        .then(() => self.clients.claim()));
+});
+
+function trim(cache) {
+    // keys() lists entries in insertion order, oldest first
+    return cache.keys().then(requests => Promise.all(
+        requests.slice(0, Math.max(0, requests.length - RUNTIME_MAX_ENTRIES)).map(request => cache.delete(request))));
+}
+
+function staleWhileRevalidate(event) {
+    return caches.open(RUNTIME_NAME).then(cache => cache.match(event.request).then(cached => {
+        const fresh = fetch(event.request).then(response => {
+            if (response.ok) {
+                event.waitUntil(cache.put(event.request, response.clone()).then(() => trim(cache)));
+            }
+            return response;
+        });
+        if (cached) {
+            event.waitUntil(fresh.catch(() => {}));
+            return cached;
+        }
+        return fresh;
+    }));
+}
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== self.location.origin) return;
+    const path = url.pathname + url.search;
+    if (path in PRECACHE) {
+        event.respondWith(caches.open(PRECACHE_NAME).then(cache =>
+            cache.match(precacheKey(path)).then(hit => hit || fetch(event.request))));
+    } else if (event.request.mode === 'navigate' || /\.(html|json)$/.test(url.pathname)) {
+        event.respondWith(staleWhileRevalidate(event));
+    }
+});
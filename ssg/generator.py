@@ -1,19 +1,43 @@
 import os
+import sys
 import pathlib
 from pathlib import Path
-import shutil
 import html
 import re
-from datetime import datetime
+from datetime import date, datetime, timezone
+from operator import attrgetter
 import json
+import hashlib
+import gzip
+import argparse
+import sqlite3
+import subprocess
 from collections import Counter
+from itertools import groupby
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import threading
+import http.server
+import time
+import cProfile
+import pstats
 
 
 LANGS = ["en","ru"]
 
+PARSE_CACHE_PATH = "./.cache/parse.json"
+PARSE_CACHE_VERSION = 1
+BUILD_GRAPH_PATH = "./.cache/graph.json"
+INDEX_PATH = "./.cache/data.sqlite"
+FRAGMENTS_PATH = "./.cache/fragments.json"
+MANIFEST_PATH = "./.cache/manifest.json"
+COMPRESS_PATH = "./.cache/compress.json"
+DELTA_PATH = "./.cache/deploy-delta.json"
+PROFILE_PATH = "./.cache/profile.json"
 
-def human_date(date_str, lang='en'):
-    date = datetime.strptime(date_str, "%Y-%m-%d")
+
+def human_date(date, lang='en'):
     months_en = [
         'January', 'February', 'March', 'April', 'May', 'June', 
         'July', 'August', 'September', 'October', 'November', 'December'
@@ -36,6 +60,12 @@ def extract_numbers(s):
     return match.group(1) if match else None
 
 
+def thousand_bucket(n):
+    if n % 1000 == 0:
+        return n
+    return (n // 1000 + 1) * 1000
+
+
 def torsf(rsf):
     if rsf == "/":
         return "/"
@@ -50,41 +80,397 @@ def ensure_fields(d):
         if x == "author-id":
             d[x] = extract_numbers(d[x])
 
-def parse_fmd(file_path, keystr='###'):
-    escaped_keystr = re.escape(keystr)
-    with open(file_path, 'r', encoding='utf-8') as file:
-        content = file.read()
-    content = re.sub(r'<!--(?:[^-]|-(?!->))*-->', '', content)    
-    pattern = fr'{escaped_keystr}\s*([^\n]+)\n(.*?)(?=\n{escaped_keystr}|\Z)'
-    matches = re.findall(pattern, content, re.DOTALL)
-    res = { key.strip(): value.strip() for key, value in matches }
-    for x in res:
-        res[x] = html.escape(res[x])
+def read_fmd(file_path):
+    with open(file_path, 'rb') as file:
+        raw = file.read()
+    content = raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+    return content, hashlib.sha1(raw).hexdigest()
+
+
+HTML_SPECIAL_RE = re.compile(r'[&<>"\']')
+
+def escape_value(s):
+    return html.escape(s) if HTML_SPECIAL_RE.search(s) else s
+
+
+def strip_comments(content):
+    # drop <!-- --> comments with a forward scan, same matches as
+    # re.sub(r'<!--(?:[^-]|-(?!->))*-->', '', content)
+    c = content.find('<!--')
+    if c < 0:
+        return content
+    parts = []
+    start = 0
+    while c >= 0:
+        end = content.find('-->', c + 4)
+        if end < 0:
+            break
+        parts.append(content[start:c])
+        start = end + 3
+        c = content.find('<!--', start)
+    parts.append(content[start:])
+    return ''.join(parts)
+
+
+def parse_fmd_content(content, keystr='###'):
+    # one split on the `\n###` header lines; each section is its header line
+    # (the key) followed by the value up to the next header
+    content = '\n' + strip_comments(content)
+    sep = '\n' + keystr
+    sections = content.split(sep)
+    # text before the first header line only counts from a `###` inside it
+    h = sections[0].find(keystr)
+    if h >= 0:
+        sections[0] = sections[0][h + len(keystr):]
+        i = 0
+    else:
+        i = 1
+    n = len(sections)
+    res = {}
+    while i < n:
+        key, nl, value = sections[i].partition('\n')
+        key = key.strip()
+        if not key:
+            i = parse_keyless(content, sections, i, h, keystr, res)
+            continue
+        i += 1
+        if not nl:
+            # no newline after the key: either the last line of the file, or a
+            # header right below this one, which then belongs to the value
+            if i == n:
+                break
+            value = keystr + sections[i]
+            i += 1
+        res[key] = escape_value(value.strip())
     ensure_fields(res)
     return res
 
 
-def parse_dir(directory, extension):
+def parse_keyless(content, sections, i, h, keystr, res):
+    # a header line with no key on it (sections[i]): the key is the next line
+    # with anything on it, provided a newline follows; otherwise the regex
+    # backtracks to the last blank character before a newline. Returns the
+    # index of the section to go on from
+    sep = '\n' + keystr
+    start = (h + len(keystr) if h >= 0 else 0) + sum(map(len, sections[:i])) + i * len(sep)
+    n = len(content)
+    k = start
+    while k < n and content[k].isspace():
+        k += 1
+    nl = content.find('\n', k) if k < n else -1
+    if nl < 0:
+        nl = content.rfind('\n', start, k)
+        while nl > start and content[nl - 1] == '\n':
+            nl -= 1
+        if nl <= start:
+            return len(sections)
+        k = nl - 1
+    end = content.find(sep, nl + 1)
+    if end < 0:
+        end = n
+    res[content[k:nl].strip()] = escape_value(content[nl + 1:end].strip())
+    # the value ends at a header line, which starts the section to go on from
+    while start <= end and i < len(sections):
+        start += len(sections[i]) + len(sep)
+        i += 1
+    return i
+
+
+def parse_fmd(file_path, keystr='###'):
+    with open(file_path, 'r', encoding='utf-8') as file:
+        content = file.read()
+    return parse_fmd_content(content, keystr)
+
+
+# parse cache: path -> size/mtime/hash + normalized fields
+def load_parse_cache(path=PARSE_CACHE_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get("version") == PARSE_CACHE_VERSION:
+            return cache
+    except (OSError, ValueError):
+        pass
+    return {"version": PARSE_CACHE_VERSION, "files": {}}
+
+
+def save_parse_cache(cache, path=PARSE_CACHE_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def parse_fmd_cached(file_path, cache):
+    st = os.stat(file_path)
+    entry = cache["files"].get(file_path)
+    if entry is not None and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+        return dict(entry["fields"])
+    # size/mtime differ (fresh checkout, touch): fall back to the content hash
+    content, digest = read_fmd(file_path)
+    if entry is None or entry["hash"] != digest:
+        entry = {"hash": digest, "fields": parse_fmd_content(content)}
+    entry["size"] = st.st_size
+    entry["mtime"] = st.st_mtime_ns
+    cache["files"][file_path] = entry
+    return dict(entry["fields"])
+
+
+def natural_key(name):
+    n = extract_numbers(name)
+    return (0, int(n), name) if n is not None else (1, 0, name)
+
+
+def parse_dir(directory, extension, cache=None):
     results = {} 
+    seen = set()
     for root, dirs, files in os.walk(directory):
-        for file in files:
+        # walk buckets and files in id order so builds don't depend on the filesystem
+        dirs.sort(key=natural_key)
+        for file in sorted(files, key=natural_key):
             if file.endswith(extension):
                 nf = extract_numbers(file)
                 if nf is None:
                     continue
                 full_path = os.path.join(root, file)
+                seen.add(full_path)
                 try:
-                    file_result = parse_fmd(full_path) 
+                    if cache is None:
+                        file_result = parse_fmd(full_path)
+                    else:
+                        file_result = parse_fmd_cached(full_path, cache)
                     file_result["id"] = nf                   
                     if 'id' in file_result:
                         results[file_result['id']] = file_result
                 except Exception as e:
                     print(f"parse_dir error {full_path}: {e}")
 
+    if cache is not None:
+        prefix = os.path.join(directory, '')
+        for path in [p for p in cache["files"] if p.startswith(prefix) and p not in seen]:
+            del cache["files"][path]
+
     return results
 
 
 
+# sqlite index: data/**/*.md compiled into one queryable file
+# 2: dates stored as YYYY-MM-DD, posts with a bad date or status value left out
+INDEX_VERSION = 2
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, kind TEXT NOT NULL, id TEXT NOT NULL, size INTEGER, mtime INTEGER, hash TEXT);
+CREATE TABLE IF NOT EXISTS authors (id TEXT PRIMARY KEY, num INTEGER NOT NULL, fields TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    num INTEGER NOT NULL,
+    author_id TEXT,
+    status TEXT,
+    complexity TEXT,
+    confidence TEXT,
+    time_statement TEXT,
+    time_awaiting TEXT,
+    time_verified TEXT,
+    original_language TEXT,
+    fields TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS authors_num ON authors(num);
+CREATE INDEX IF NOT EXISTS posts_num ON posts(num);
+CREATE INDEX IF NOT EXISTS posts_status ON posts(status);
+CREATE INDEX IF NOT EXISTS posts_complexity ON posts(complexity);
+CREATE INDEX IF NOT EXISTS posts_confidence ON posts(confidence);
+CREATE INDEX IF NOT EXISTS posts_language ON posts(original_language);
+CREATE INDEX IF NOT EXISTS posts_new ON posts(COALESCE(NULLIF(time_statement, ''), '9999-12-31'), id);
+CREATE INDEX IF NOT EXISTS posts_awaiting ON posts(status, COALESCE(NULLIF(time_awaiting, ''), '9999-12-31'), id);
+CREATE INDEX IF NOT EXISTS posts_verified ON posts(COALESCE(NULLIF(time_verified, ''), '9999-12-31'), id);
+CREATE INDEX IF NOT EXISTS posts_author_new ON posts(author_id, COALESCE(NULLIF(time_statement, ''), '9999-12-31') DESC, id DESC);
+CREATE INDEX IF NOT EXISTS posts_author_awaiting ON posts(status, author_id, COALESCE(NULLIF(time_awaiting, ''), '9999-12-31'), id);
+CREATE INDEX IF NOT EXISTS posts_author_verified ON posts(author_id, COALESCE(NULLIF(time_verified, ''), '9999-12-31') DESC, id DESC);
+"""
+
+# same orderings as sort_new / sort_awaiting / sort_verified
+INDEX_FEEDS = {
+    "new": ("1", "COALESCE(NULLIF(time_statement, ''), '9999-12-31') DESC, id DESC"),
+    "awaiting": ("status = 'awaiting'", "COALESCE(NULLIF(time_awaiting, ''), '9999-12-31'), id"),
+    "verified": ("status != 'awaiting'", "COALESCE(NULLIF(time_verified, ''), '9999-12-31') DESC, id DESC"),
+}
+# a post whose author has no file is indexed but left out of the builds
+KNOWN_AUTHOR = "author_id IN (SELECT id FROM authors)"
+
+
+def open_index(path=INDEX_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    row = None
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    except sqlite3.OperationalError:
+        pass
+    if row is None or row[0] != str(INDEX_VERSION):
+        conn.executescript("DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS authors; DROP TABLE IF EXISTS posts;")
+        conn.executescript(INDEX_SCHEMA)
+        conn.execute("INSERT INTO meta (key, value) VALUES ('version', ?)", (str(INDEX_VERSION),))
+        conn.commit()
+    return conn
+
+
+def _index_row(kind, nf, fields):
+    data = json.dumps(fields, ensure_ascii=False)
+    if kind == "authors":
+        return "INSERT OR REPLACE INTO authors (id, num, fields) VALUES (?, ?, ?)", (nf, int(nf), data)
+    # raises ValueError on a bad or empty date or status value, as the builds would;
+    # dates are stored normalized, so they sort like the parsed dates
+    p = Post(fields)
+    dates = [x.isoformat() if x else "" for x in (p.time_statement, p.time_awaiting, p.time_verified)]
+    return (
+        "INSERT OR REPLACE INTO posts (id, num, author_id, status, complexity, confidence, time_statement, time_awaiting, time_verified, original_language, fields) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (nf, int(nf), fields.get("author-id"), fields.get("status"), fields.get("complexity"), fields.get("confidence"),
+         *dates, fields.get("original-language"), data),
+    )
+
+
+def build_index(path=INDEX_PATH, data_dir="./data"):
+    """Bring the sqlite index in line with data_dir, re-parsing only changed files.
+    Files are looked up in the index one at a time, so memory use does not
+    grow with the number of files."""
+    conn = open_index(path)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM seen")
+    changed = 0
+    with conn:
+        for kind in ["authors", "posts"]:
+            for root, dirs, files in os.walk(os.path.join(data_dir, kind)):
+                dirs.sort(key=natural_key)
+                for file in sorted(files, key=natural_key):
+                    nf = extract_numbers(file)
+                    if not file.endswith(".md") or nf is None:
+                        continue
+                    full_path = os.path.join(root, file)
+                    conn.execute("INSERT OR IGNORE INTO seen (path) VALUES (?)", (full_path,))
+                    st = os.stat(full_path)
+                    prev = conn.execute("SELECT kind, id, size, mtime, hash FROM files WHERE path = ?", (full_path,)).fetchone()
+                    if prev is not None and prev[2] == st.st_size and prev[3] == st.st_mtime_ns:
+                        continue
+                    try:
+                        content, digest = read_fmd(full_path)
+                        if prev is None or prev[4] != digest or prev[1] != nf:
+                            fields = parse_fmd_content(content)
+                            fields["id"] = nf
+                            if prev is not None and prev[1] != nf:
+                                conn.execute(f"DELETE FROM {kind} WHERE id = ?", (prev[1],))
+                            conn.execute(*_index_row(kind, nf, fields))
+                            changed += 1
+                        conn.execute("INSERT OR REPLACE INTO files (path, kind, id, size, mtime, hash) VALUES (?, ?, ?, ?, ?, ?)",
+                                     (full_path, kind, nf, st.st_size, st.st_mtime_ns, digest))
+                    except Exception as e:
+                        print(f"build_index error {full_path}: {e}")
+                        # not indexed until it is fixed, not even as it was before;
+                        # without its files row it is parsed again on the next run
+                        # even if the fix restores the bytes the hash was taken of
+                        conn.execute("DELETE FROM files WHERE path = ?", (full_path,))
+                        conn.execute(f"DELETE FROM {kind} WHERE id = ?", (nf,))
+        gone = conn.execute("SELECT path, kind, id FROM files WHERE path NOT IN (SELECT path FROM seen)").fetchall()
+        for full_path, kind, nf in gone:
+            conn.execute("DELETE FROM files WHERE path = ?", (full_path,))
+            # a file moved to another path keeps its id, and its row
+            conn.execute(f"DELETE FROM {kind} WHERE id = ? AND NOT EXISTS (SELECT 1 FROM files WHERE kind = ? AND id = ?)", (nf, kind, nf))
+            changed += 1
+    return conn, changed
+
+
+def load_index(conn):
+    authors = {}
+    for (data,) in conn.execute("SELECT fields FROM authors ORDER BY num"):
+        a = json.loads(data)
+        authors[a["id"]] = a
+    posts = {}
+    for (data,) in conn.execute("SELECT fields FROM posts ORDER BY num"):
+        p = json.loads(data)
+        posts[p["id"]] = p
+    return authors, posts
+
+
+def index_feed(conn, feed):
+    where, order = INDEX_FEEDS[feed]
+    return [row[0] for row in conn.execute(f"SELECT id FROM posts WHERE ({where}) AND {KNOWN_AUTHOR} ORDER BY {order}")]
+
+
+def index_author_feeds(conn, feed):
+    where, order = INDEX_FEEDS[feed]
+    res = {}
+    for author_id, post_id in conn.execute(f"SELECT author_id, id FROM posts WHERE {where} ORDER BY author_id, {order}"):
+        res.setdefault(author_id, []).append(post_id)
+    return res
+
+
+# posts and authors are parsed into field dicts (the parse cache and the
+# sqlite index store those) and then turned into slotted objects that the
+# pages are rendered from: a bilingual field is a tuple in LANGS order, read
+# as post.statement[LANG_INDEX[rlang]]; dates are datetime.date (None when
+# empty), one shared object per distinct date; status, complexity and
+# confidence are int codes into the lists below
+STATUSES = ["awaiting", "completely", "almost", "didnot", "unverifiable"]
+COMPLEXITIES = ["regular", "complex"]
+CONFIDENCES = ["careful", "confident"]
+AWAITING = STATUSES.index("awaiting")
+LANG_INDEX = {rlang: i for i, rlang in enumerate(LANGS)}
+
+
+def bilingual(fields, key):
+    return tuple(fields.get(f"{key}.{rlang}", "") for rlang in LANGS)
+
+
+DATES = {}
+
+def parse_date(value):
+    if not value:
+        return None
+    d = DATES.get(value)
+    if d is None:
+        # strptime, not date.fromisoformat: 2024-1-5 is accepted, as
+        # tools/validate.py accepts it
+        d = DATES[value] = datetime.strptime(value, "%Y-%m-%d").date()
+    return d
+
+
+class Author:
+    __slots__ = ("id", "slug", "name", "description", "posts", "stat", "heatmap")
+
+    def __init__(self, fields):
+        self.id = fields["id"]
+        self.slug = fields.get("slug", "")
+        self.name = bilingual(fields, "name")
+        self.description = bilingual(fields, "description")
+        self.posts = []
+        self.stat = None
+        self.heatmap = None
+
+
+class Post:
+    __slots__ = ("id", "author_id", "statement", "context", "title", "notes", "original_language",
+                 "time_statement", "time_awaiting", "time_verified", "status", "complexity", "confidence", "params")
+
+    def __init__(self, fields):
+        self.id = fields["id"]
+        self.author_id = fields.get("author-id")
+        self.statement = bilingual(fields, "statement")
+        self.context = bilingual(fields, "context")
+        self.title = bilingual(fields, "title")
+        self.notes = bilingual(fields, "notes")
+        self.original_language = fields.get("original-language", "")
+        self.time_statement = parse_date(fields.get("time-statement"))
+        if self.time_statement is None:
+            raise ValueError("time-statement is empty")
+        self.time_awaiting = parse_date(fields.get("time-awaiting"))
+        self.time_verified = parse_date(fields.get("time-verified"))
+        self.status = STATUSES.index(fields.get("status"))
+        self.complexity = COMPLEXITIES.index(fields.get("complexity"))
+        self.confidence = CONFIDENCES.index(fields.get("confidence"))
+        self.params = rate_post(self)
+
+
 def autolink(text):
     URL_RE = re.compile(r'(https?://[^\s\]\)]+)', re.IGNORECASE)    
     return URL_RE.sub(lambda m: f'<a class="o" href="{html.escape(m.group(1))}" target="_blank" rel="noopener">{html.escape(m.group(1))}</a>', html.escape(text))
@@ -101,54 +487,109 @@ def status_color(status):
 	return d[status]
 
 
+STATUS_COLORS = [status_color(x) for x in STATUSES]
+
+
 def suplang(orig,rlang):
     return '' if orig == rlang else f'<sup>{orig} → {rlang}</sup>'
 
 
+RATE_TABLE = {
+    "awaiting,complex,confident":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
+    "awaiting,complex,careful":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
+    "awaiting,regular,confident":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
+    "awaiting,regular,careful":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
+    "unverifiable,complex,confident":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
+    "unverifiable,complex,careful":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
+    "unverifiable,regular,confident":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
+    "unverifiable,regular,careful":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},  
+
+    "completely,complex,confident":{"status":" (+7)", "complexity":" (+2)", "confidence":" (+1)", "total":"10 (7+2+1)", "r":10},
+    "completely,complex,careful":{"status":" (+7)", "complexity":" (+2)", "confidence":" (+0)", "total":"9 (7+2+0)", "r":9},
+    "completely,regular,confident":{"status":" (+7)", "complexity":" (+0)", "confidence":" (+1)", "total":"8 (7+0+1)", "r":8},
+    "completely,regular,careful":{"status":" (+7)", "complexity":" (+0)", "confidence":" (+0)", "total":"7 (7+0+0)", "r":7},
+
+    "almost,complex,confident":{"status":" (+5)", "complexity":" (+2)", "confidence":" (+0)", "total":"7 (5+2+0)", "r":7},
+    "almost,complex,careful":{"status":" (+5)", "complexity":" (+2)", "confidence":" (+0)", "total":"7 (5+2+0)", "r":7},
+    "almost,regular,confident":{"status":" (+5)", "complexity":" (+0)", "confidence":" (+0)", "total":"5 (5+0+0)", "r":5},
+    "almost,regular,careful":{"status":" (+5)", "complexity":" (+0)", "confidence":" (+0)", "total":"5 (5+0+0)", "r":5},
+
+    "didnot,complex,confident":{"status":" (+2)", "complexity":" (+0)", "confidence":" (-1)", "total":"1 (2+0-1)", "r":1},
+    "didnot,complex,careful":{"status":" (+2)", "complexity":" (+0)", "confidence":" (+0)", "total":"2 (2+0+0)", "r":2},
+    "didnot,regular,confident":{"status":" (+2)", "complexity":" (+0)", "confidence":" (-1)", "total":"1 (2+0-1)", "r":1},
+    "didnot,regular,careful":{"status":" (+2)", "complexity":" (+0)", "confidence":" (+0)", "total":"2 (2+0+0)", "r":2},                       
+}
+
+
 def rate_post(p):
-    res = {
-        "awaiting,complex,confident":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
-        "awaiting,complex,careful":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
-        "awaiting,regular,confident":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
-        "awaiting,regular,careful":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
-        "unverifiable,complex,confident":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
-        "unverifiable,complex,careful":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
-        "unverifiable,regular,confident":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},
-        "unverifiable,regular,careful":{"status":"", "complexity":"", "confidence":"", "total":"", "r":None},  
-
-        "completely,complex,confident":{"status":" (+7)", "complexity":" (+2)", "confidence":" (+1)", "total":"10 (7+2+1)", "r":10},
-        "completely,complex,careful":{"status":" (+7)", "complexity":" (+2)", "confidence":" (+0)", "total":"9 (7+2+0)", "r":9},
-        "completely,regular,confident":{"status":" (+7)", "complexity":" (+0)", "confidence":" (+1)", "total":"8 (7+0+1)", "r":8},
-        "completely,regular,careful":{"status":" (+7)", "complexity":" (+0)", "confidence":" (+0)", "total":"7 (7+0+0)", "r":7},
-
-        "almost,complex,confident":{"status":" (+5)", "complexity":" (+2)", "confidence":" (+0)", "total":"7 (5+2+0)", "r":7},
-        "almost,complex,careful":{"status":" (+5)", "complexity":" (+2)", "confidence":" (+0)", "total":"7 (5+2+0)", "r":7},
-        "almost,regular,confident":{"status":" (+5)", "complexity":" (+0)", "confidence":" (+0)", "total":"5 (5+0+0)", "r":5},
-        "almost,regular,careful":{"status":" (+5)", "complexity":" (+0)", "confidence":" (+0)", "total":"5 (5+0+0)", "r":5},
-
-        "didnot,complex,confident":{"status":" (+2)", "complexity":" (+0)", "confidence":" (-1)", "total":"1 (2+0-1)", "r":1},
-        "didnot,complex,careful":{"status":" (+2)", "complexity":" (+0)", "confidence":" (+0)", "total":"2 (2+0+0)", "r":2},
-        "didnot,regular,confident":{"status":" (+2)", "complexity":" (+0)", "confidence":" (-1)", "total":"1 (2+0-1)", "r":1},
-        "didnot,regular,careful":{"status":" (+2)", "complexity":" (+0)", "confidence":" (+0)", "total":"2 (2+0+0)", "r":2},                       
-    }
-    return res[f'{p["status"]},{p["complexity"]},{p["confidence"]}']
+    return COMBO_PARAMS[combo_code(p)]
 
 
-def bayesian_average(v):
+def bayesian_average_sum(total, n):
     m = 5.5
     C = 10
-    return (C*m + sum(v))/(C + len(v))
-
-def calc_stat(posts):
-    status_counts = Counter(item['status'] for item in posts)
-    complexity_counts = Counter(item['complexity'] for item in posts)
-    confidence_counts = Counter(item['confidence'] for item in posts)
-    # r_counts = Counter(item['params']['r'] for item in posts)
-    b  = bayesian_average([item['params']['r'] for item in posts if item['params']['r']])
-    
+    return (C*m + total)/(C + n)
+
+# posts are reduced to a columnar table of small integer codes: the author and
+# the (status, complexity, confidence) combination, which also determines the
+# post's rating; all aggregates are then counts per (author, combination)
+COMBOS = [(s, c, f) for s in STATUSES for c in COMPLEXITIES for f in CONFIDENCES]
+COMBO_PARAMS = [RATE_TABLE[",".join(x)] for x in COMBOS]
+COMBO_RATING = [x["r"] for x in COMBO_PARAMS]
+
+
+def combo_code(p):
+    # index into COMBOS
+    return (p.status * len(COMPLEXITIES) + p.complexity) * len(CONFIDENCES) + p.confidence
+
+
+def post_table(posts, author_codes):
+    authors = array('i')
+    combos = array('B')
+    for p in posts:
+        authors.append(author_codes[p.author_id])
+        combos.append(combo_code(p))
+    return authors, combos
+
+
+def grouped_counts(table, ngroups):
+    # one pass over the table: counts[g][c] is the number of posts of group g
+    # with combination c
+    authors, combos = table
+    n = len(COMBOS)
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        keys = np.frombuffer(authors, dtype=np.int32).astype(np.int64) * n + np.frombuffer(combos, dtype=np.uint8)
+        flat = np.bincount(keys, minlength=ngroups * n).tolist()
+    else:
+        flat = [0] * (ngroups * n)
+        for a, c in zip(authors, combos):
+            flat[a * n + c] += 1
+    return [flat[g * n:(g + 1) * n] for g in range(ngroups)]
+
+
+def stat_from_counts(counts, total_authors):
+    status_counts = Counter()
+    complexity_counts = Counter()
+    confidence_counts = Counter()
+    rsum = 0
+    rn = 0
+    for (status, complexity, confidence), r, k in zip(COMBOS, COMBO_RATING, counts):
+        if k:
+            status_counts[status] += k
+            complexity_counts[complexity] += k
+            confidence_counts[confidence] += k
+            if r:
+                rsum += r * k
+                rn += k
+    b = bayesian_average_sum(rsum, rn)
+
     stat = {}
-    stat["total_authors"] = len(set([item["author-id"] for item in posts]))
-    stat["total_posts"] = len(posts)
+    stat["total_authors"] = total_authors
+    stat["total_posts"] = sum(counts)
     stat["total_verified"] = status_counts["completely"] + status_counts["almost"] + status_counts["didnot"]
     stat["success"] = status_counts["completely"] + status_counts["almost"]
     stat["success_pct"] = str(round(stat["success"]*100 / stat["total_verified"]))+"%" if stat["total_verified"] != 0 else "*"
@@ -159,14 +600,28 @@ def calc_stat(posts):
     return stat
 
 
+def calc_stats(authors, posts):
+    """Per-author stats and the site-wide stat from one grouped pass over posts."""
+    codes = {a.id: i for i, a in enumerate(authors)}
+    return stats_from_counts(grouped_counts(post_table(posts, codes), len(authors)))
+
+
+def stats_from_counts(counts):
+    # counts[g][c]: posts of author g with combination c, as from grouped_counts()
+    stats = [stat_from_counts(x, 1 if sum(x) else 0) for x in counts]
+    total = [sum(col) for col in zip(*counts)] if counts else [0] * len(COMBOS)
+    main_stat = stat_from_counts(total, sum(1 for x in counts if sum(x)))
+    return stats, main_stat
+
+
 def calc_ranking(authors):
-    return sorted([item for item in authors if item['stat']['total_verified'] >= 10], key=lambda x: (x['stat']['ratingf'], x['stat']['total_verified']), reverse=True)
+    return sorted([item for item in authors if item.stat['total_verified'] >= 10], key=lambda x: (x.stat['ratingf'], x.stat['total_verified']), reverse=True)
 
 def calc_ranking_posts(authors):
-    return sorted([item for item in authors], key=lambda x: (x['stat']['total_posts']), reverse=True)
+    return sorted([item for item in authors], key=lambda x: (x.stat['total_posts']), reverse=True)
 
 def calc_ranking_verified(authors):
-    return sorted([item for item in authors], key=lambda x: (x['stat']['total_verified']), reverse=True)
+    return sorted([item for item in authors], key=lambda x: (x.stat['total_verified']), reverse=True)
 
 
 
@@ -190,159 +645,335 @@ def render_stat(stat, items, locales, rlang, linkflag=False, boldflag=""):
     return "\n".join(parts)
 
 
-def render_heatmap(posts, locales, rlang):
-    ps = sorted(posts, key=lambda x: (x['time-statement'] if x['time-statement'] else "9999-12-31", x['id']), reverse=False)
+# an author's heatmap is packed once per author and expanded into one link
+# per post by assets/heatmap.js: a color code per post in date order and the
+# post ids as base-36 deltas
+HEATMAP_CODES = [{"completely": "p", "almost": "p", "didnot": "r"}.get(x, "g") for x in STATUSES]
+
+
+def base36(n):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    sign = "-" if n < 0 else ""
+    n = abs(n)
+    res = ""
+    while True:
+        n, r = divmod(n, 36)
+        res = digits[r] + res
+        if n == 0:
+            return sign + res
 
-    parts = []
-    parts.append('<div class="heatmap">')
-    for x in ps:
-        color = ""
-        if x["status"] in ['completely', 'almost']:
-            color = "p"
-        if x["status"] in ['didnot']:
-            color = "rh"
-        if x["status"] in ['awaiting','unverifiable']:
-            color = "g"
-        # data-tooltip="{human_date(x["time-statement"],rlang)}"    
-        parts.append(f'<a class="hmc {color}" href="/{rlang}/{x["author-id"]}/{x["id"]}"></a>')            
-    parts.append('</div>')
-    return "\n".join(parts)
+
+def pack_heatmap(posts):
+    ps = sorted(posts, key=lambda x: (x.time_statement or date.max, x.id), reverse=False)
+    return encode_heatmap([(int(x.id), x.status) for x in ps])
+
+
+def encode_heatmap(items):
+    # [(post id, status code)] in heatmap order
+    ids = [pid for pid, _ in items]
+    codes = "".join(HEATMAP_CODES[status] for _, status in items)
+    return codes, ",".join(base36(b - a) for a, b in zip([0] + ids, ids))
+
+
+def render_heatmap(author):
+    codes, ids = author.heatmap
+    return f'<div class="heatmap" data-author="{author.id}" data-hm="{codes}" data-ids="{ids}"></div>'
 
 
 def render_ranking(ranking, rlang, locales):
+    li = LANG_INDEX[rlang]
     parts = []
     parts.append('<table>')
     parts.append('<tbody>')
     for i,x in enumerate(ranking):
-        rtg_color = "p" if x["stat"]["ratingf"] >= 5.5 else "r"
-        parts.append(f'<tr> <td width="1rem"><b>{i+1}.<b></td> <td><a class="d" href="/{rlang}/{x["id"]}"><b>{x["name."+rlang]}</b><br><small>{x["description."+rlang]}</small><a/></td> <td width="1rem"><a class="d" href="/{rlang}/{x["id"]}"><span class="badge rtg {rtg_color}"><small><b>{x["stat"]["rating"]}</b></small></span></a></td> </tr>')
+        rtg_color = "p" if x.stat["ratingf"] >= 5.5 else "r"
+        parts.append(f'<tr> <td width="1rem"><b>{i+1}.<b></td> <td><a class="d" href="/{rlang}/{x.id}"><b>{x.name[li]}</b><br><small>{x.description[li]}</small><a/></td> <td width="1rem"><a class="d" href="/{rlang}/{x.id}"><span class="badge rtg {rtg_color}"><small><b>{x.stat["rating"]}</b></small></span></a></td> </tr>')
     parts.append('</tbody>')
     parts.append('</table>')
     return "\n".join(parts)
 
 
 def render_authors(authors, rlang, locales):
+    li = LANG_INDEX[rlang]
     parts = []
     parts.append('<table>')
     parts.append('<tbody>')
     for i,x in enumerate(authors):
-        parts.append(f'<tr> <td><a class="d" href="/{rlang}/{x["id"]}"><b>{x["name."+rlang]}</b> ({x["stat"]["total_posts"]}/{x["stat"]["total_verified"]})<br><small>{x["description."+rlang]}</small><a/></td></tr>')
+        parts.append(f'<tr> <td><a class="d" href="/{rlang}/{x.id}"><b>{x.name[li]}</b> ({x.stat["total_posts"]}/{x.stat["total_verified"]})<br><small>{x.description[li]}</small><a/></td></tr>')
     parts.append('</tbody>')
     parts.append('</table>')
     return "\n".join(parts)
 
 
 def render_post_item(post, author, rlang, rsf, locales):
+    li = LANG_INDEX[rlang]
     parts = []
     parts.append("<hgroup>")
-    parts.append(f"<h4><a href='/{rlang}/{author["id"]}'>{author["name."+rlang]}</a></h4>")
-    parts.append(f"<p><time datetime='{post["time-statement"]}'>{human_date(post["time-statement"],rlang)}</time> {suplang(post["original-language"],rlang)}</p>")
+    parts.append(f"<h4><a href='/{rlang}/{author.id}'>{author.name[li]}</a></h4>")
+    parts.append(f"<p><time datetime='{post.time_statement}'>{human_date(post.time_statement,rlang)}</time> {suplang(post.original_language,rlang)}</p>")
     parts.append("</hgroup>")
-    parts.append(f"<p>{post["statement."+rlang].replace('\n', '<br>').rstrip('.')}")
-    if post["context."+rlang].strip() != "":
-        parts.append(f"<span class='g2'>({post["context."+rlang].rstrip('.')})</span>")
+    parts.append(f"<p>{post.statement[li].replace('\n', '<br>').rstrip('.')}")
+    if post.context[li].strip() != "":
+        parts.append(f"<span class='g2'>({post.context[li].rstrip('.')})</span>")
     parts.append(f"</p>")
-    parts.append(f"<small class='badge {status_color(post["status"])}'>{locales[post["status"]][rlang]}</small>")
+    parts.append(f"<small class='badge {STATUS_COLORS[post.status]}'>{locales[STATUSES[post.status]][rlang]}</small>")
     
-    if post["status"] == "awaiting" and post["time-awaiting"] != "" and rsf == "awaiting":
-        parts.append(f"<small class='badge {status_color(post["status"])}'>{human_date(post["time-awaiting"],rlang)}</small>")
-    elif post["status"] != "awaiting" and post["time-verified"] != "" and rsf == "verified":
-        parts.append(f"<small class='badge {status_color(post["status"])}'>{human_date(post["time-verified"],rlang)}</small>") 
+    if post.status == AWAITING and post.time_awaiting and rsf == "awaiting":
+        parts.append(f"<small class='badge {STATUS_COLORS[post.status]}'>{human_date(post.time_awaiting,rlang)}</small>")
+    elif post.status != AWAITING and post.time_verified and rsf == "verified":
+        parts.append(f"<small class='badge {STATUS_COLORS[post.status]}'>{human_date(post.time_verified,rlang)}</small>") 
     
-    parts.append(f"<a class='linka' href='/{rlang}/{author["id"]}/{post["id"]}'></a>")
+    parts.append(f"<a class='linka' href='/{rlang}/{author.id}/{post.id}'></a>")
     return "<article>" + "\n".join(parts) + "</article>"
 
 
 def render_post(post, author, rlang, locales):
+    li = LANG_INDEX[rlang]
     parts = []
     parts.append("<hgroup>")
-    parts.append(f"<h4><a href='/{rlang}/{author["id"]}'>{author["name."+rlang]}</a></h4>")
-    parts.append(f"<p><time datetime='{post["time-statement"]}'>{human_date(post["time-statement"],rlang)}</time> {suplang(post["original-language"],rlang)}</p>")
+    parts.append(f"<h4><a href='/{rlang}/{author.id}'>{author.name[li]}</a></h4>")
+    parts.append(f"<p><time datetime='{post.time_statement}'>{human_date(post.time_statement,rlang)}</time> {suplang(post.original_language,rlang)}</p>")
     parts.append("</hgroup>")
-    parts.append(f"<p>{post["statement."+rlang].replace('\n', '<br>').rstrip('.')}")
-    if post["context."+rlang].strip() != "":
-        parts.append(f"<span class='g2'>({post["context."+rlang].rstrip('.')})</span>")
+    parts.append(f"<p>{post.statement[li].replace('\n', '<br>').rstrip('.')}")
+    if post.context[li].strip() != "":
+        parts.append(f"<span class='g2'>({post.context[li].rstrip('.')})</span>")
     parts.append(f"</p>")    
 
 
-    parts.append(f"<small class='badge {status_color(post["status"])}'>{locales[post["status"]][rlang]}</small>")
-    if post["status"] == "awaiting" and post["time-awaiting"] != "":
-        parts.append(f"<small class='badge {status_color(post["status"])}'>{human_date(post["time-awaiting"],rlang)}</small>")
-    elif post["status"] != "awaiting" and post["time-verified"] != "":
-        parts.append(f"<small class='badge {status_color(post["status"])}'>{human_date(post["time-verified"],rlang)}</small>")     
+    parts.append(f"<small class='badge {STATUS_COLORS[post.status]}'>{locales[STATUSES[post.status]][rlang]}</small>")
+    if post.status == AWAITING and post.time_awaiting:
+        parts.append(f"<small class='badge {STATUS_COLORS[post.status]}'>{human_date(post.time_awaiting,rlang)}</small>")
+    elif post.status != AWAITING and post.time_verified:
+        parts.append(f"<small class='badge {STATUS_COLORS[post.status]}'>{human_date(post.time_verified,rlang)}</small>")     
 
-    parts.append(f"<hr><small><p><b>{locales["notes_refs"][rlang]}</b><br>{autolink(post["notes."+rlang]).replace('\n', '<br>')}</p></small>")
-    parts.append(f"<small><p>{locales["params"][rlang]}: {locales[post["status"]][rlang].lower()}{post["params"]["status"]}, {locales[post["complexity"]][rlang].lower()}{post["params"]["complexity"]}, {locales[post["confidence"]][rlang].lower()}{post["params"]["confidence"]} {"<br>"+locales["post_total"][rlang] + " " + str(post["params"]["r"]) if post["params"]["r"] else ""}</p></small>")
+    parts.append(f"<hr><small><p><b>{locales["notes_refs"][rlang]}</b><br>{autolink(post.notes[li]).replace('\n', '<br>')}</p></small>")
+    parts.append(f"<small><p>{locales["params"][rlang]}: {locales[STATUSES[post.status]][rlang].lower()}{post.params["status"]}, {locales[COMPLEXITIES[post.complexity]][rlang].lower()}{post.params["complexity"]}, {locales[CONFIDENCES[post.confidence]][rlang].lower()}{post.params["confidence"]} {"<br>"+locales["post_total"][rlang] + " " + str(post.params["r"]) if post.params["r"] else ""}</p></small>")
     return "<article>" + "\n".join(parts) + "</article>"
 
 	
 
 
 
+# files and bytes actually written by this build, reported by --profile
+WRITE_STATS = {"files": 0, "bytes": 0}
+
+def write_output(path, data):
+    # leave the file (and its mtime) alone when the bytes are already there,
+    # otherwise write a temp file next to it and rename it into place;
+    # data is bytes or a list of byte segments written one after another
+    chunks = [data] if isinstance(data, bytes) else data
+    size = sum(len(c) for c in chunks)
+    output_file = Path(path)
+    try:
+        if output_file.stat().st_size == size:
+            with open(output_file, 'rb') as f:
+                if all(f.read(len(c)) == c for c in chunks):
+                    return str(output_file)
+    except OSError:
+        pass
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = output_file.with_name(f"{output_file.name}.{os.getpid()}.tmp")
+    with open(tmp_file, 'wb') as f:
+        f.writelines(chunks)
+    os.replace(tmp_file, output_file)
+    WRITE_STATS["files"] += 1
+    WRITE_STATS["bytes"] += size
+    return str(output_file)
+
+
+def write_page(path, text):
+    if isinstance(text, str):
+        return write_output(path, text.encode("utf-8"))
+    return write_output(path, [segment.encode("utf-8") for segment in text])
+
+
+def copy_outputs(src, dst):
+    files = []
+    if os.path.isfile(src):
+        return [write_output(os.path.join(dst, os.path.basename(src)), Path(src).read_bytes())]
+    for root, dirs, names in os.walk(src):
+        for name in names:
+            rel = os.path.relpath(os.path.join(root, name), src)
+            files.append(write_output(os.path.join(dst, rel), Path(root, name).read_bytes()))
+    return files
+
+
+PRECOMPRESS_EXTENSIONS = (".html", ".css", ".js", ".json", ".xml", ".svg", ".webmanifest", ".txt")
+PRECOMPRESS_MIN_SIZE = 256
+
+
+def precompress(files, record_path=COMPRESS_PATH):
+    """Write .gz (and .br when the brotli module is installed) siblings for
+    text outputs; a sibling is reused while its source hash is unchanged."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    try:
+        with open(record_path, 'r', encoding='utf-8') as f:
+            prev = json.load(f)
+    except (OSError, ValueError):
+        prev = {}
+    record = {}
+    outputs = []
+    for path in files:
+        if not path.endswith(PRECOMPRESS_EXTENSIONS):
+            continue
+        st = os.stat(path)
+        if st.st_size < PRECOMPRESS_MIN_SIZE:
+            continue
+        variants = [(".gz", lambda data: gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", lambda data: brotli.compress(data, quality=11)))
+        entry = prev.get(path)
+        if entry is not None and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+            digest = entry["hash"]
+        else:
+            digest = file_hash(path)
+        data = None
+        for ext, compress in variants:
+            if entry is None or entry["hash"] != digest or ext not in entry["variants"] or not os.path.exists(path + ext):
+                if data is None:
+                    data = Path(path).read_bytes()
+                write_output(path + ext, compress(data))
+            outputs.append(path + ext)
+        record[path] = {"hash": digest, "size": st.st_size, "mtime": st.st_mtime_ns, "variants": [ext for ext, _ in variants]}
+    Path(record_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{record_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(record, f, separators=(',', ':'))
+    os.replace(f"{record_path}.tmp", record_path)
+    return outputs
+
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def sync_public(outputs, public_path='./public', manifest_path=MANIFEST_PATH, delta_path=DELTA_PATH):
+    """Remove files that the build did not produce, write the output manifest
+    (path -> hash, size) and its delta against the previous build's manifest."""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            prev = json.load(f)["files"]
+    except (OSError, ValueError, KeyError):
+        prev = {}
+    outputs = {os.path.normpath(f) for f in outputs}
+    files = {}
+    for root, dirs, names in os.walk(public_path, topdown=False):
+        for name in names:
+            path = os.path.join(root, name)
+            if os.path.normpath(path) not in outputs:
+                os.remove(path)
+                continue
+            key = Path(os.path.relpath(path, public_path)).as_posix()
+            st = os.stat(path)
+            entry = prev.get(key)
+            if entry is None or entry["size"] != st.st_size or entry["mtime"] != st.st_mtime_ns:
+                entry = {"hash": file_hash(path), "size": st.st_size, "mtime": st.st_mtime_ns}
+            files[key] = entry
+        if os.path.normpath(root) != os.path.normpath(public_path) and not os.listdir(root):
+            os.rmdir(root)
+
+    delta = {
+        "added": sorted(k for k in files if k not in prev),
+        "changed": sorted(k for k in files if k in prev and prev[k]["hash"] != files[k]["hash"]),
+        "removed": sorted(k for k in prev if k not in files),
+    }
+    for path, data in [(manifest_path, {"files": files}), (delta_path, delta)]:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=None if path == manifest_path else 1, sort_keys=True)
+        os.replace(f"{path}.tmp", path)
+    return delta
+
+
 def create_post_page(post, author, rlang, locales):    
+    li = LANG_INDEX[rlang]
     html_block = render_post(post,author,rlang, locales)
     
-    rout = f"/{post['author-id']}/{post['id']}/"
-    title = author["name."+rlang]
-    if post["title."+rlang] != '':
-        title = post["title."+rlang] + " | " + title
+    rout = f"/{post.author_id}/{post.id}/"
+    title = author.name[li]
+    if post.title[li] != '':
+        title = post.title[li] + " | " + title
     else:
-        if len(post["statement."+rlang]) + len(post["context."+rlang]) <= 120:
-            title = post["statement."+rlang].rstrip('.') + (" | " + post["context."+rlang].rstrip('.') if post["context."+rlang] != '' else "") + " | " + title  
+        if len(post.statement[li]) + len(post.context[li]) <= 120:
+            title = post.statement[li].rstrip('.') + (" | " + post.context[li].rstrip('.') if post.context[li] != '' else "") + " | " + title  
         else:
-            title = title + " | " + post["time-statement"]
+            title = title + " | " + post.time_statement.isoformat()
     meta = {
         "rlang":rlang,
         "title":title,
         "canonical":f"{rlang}{rout}"
     }
-    html_doc = create_base(html_block, meta, rlang, locales, rout)
+    html_doc = base_segments(html_block, meta, rlang, locales, rout)
+
+    return [write_page(f"./public/{rlang}/{post.author_id}/{post.id}/index.html", html_doc)]
 
-    output_file = Path(f"./public/{rlang}/{post['author-id']}/{post['id']}/index.html")
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    output_file.write_text(html_doc, encoding="utf-8")
 
 
 
+def author_feed_path(author, rsf):
+    return f'/feed/authors/{author.id}/{"new" if rsf == "/" else rsf}'
 
-def create_author_page(author, posts, rlang, rsf, locales):
+
+def create_author_page(author, page1, npages, rlang, rsf, locales, json_feeds=False):
+    li = LANG_INDEX[rlang]
     parts = []
 
     parts.append("<article>")
     parts.append("<hgroup>")
-    parts.append(f"<h4>{author["name."+rlang]}</h4>")
-    parts.append(f"<p>{author["description."+rlang]}</p>")
+    parts.append(f"<h4>{author.name[li]}</h4>")
+    parts.append(f"<p>{author.description[li]}</p>")
     parts.append("</hgroup>")
     parts.append("<hr>")
-    parts.append(render_stat(author["stat"],["total_posts","total_verified","success_pct","rating"],locales,rlang,linkflag=False, boldflag=""))
-    parts.append(render_heatmap(author["posts"],locales, rlang))
+    parts.append(render_stat(author.stat,["total_posts","total_verified","success_pct","rating"],locales,rlang,linkflag=False, boldflag=""))
+    parts.append(render_heatmap(author))
     parts.append("</article>")
 
 
     # 
     parts.append('<p class="fnav" style="padding-left: 1em">')
-    parts.append(f"<a class='badge sec {"p" if rsf == "/" else "w"}' href='/{rlang}/{author["id"]}/'>{locales["sf"]["new"][rlang]}</a> ")
-    parts.append(f"<a class='badge sec {"p" if rsf == "awaiting" else "w"}' href='/{rlang}/{author["id"]}/awaiting'>{locales["sf"]["awaiting"][rlang]}</a> ")
-    parts.append(f"<a class='badge sec {"p" if rsf == "verified" else "w"}' href='/{rlang}/{author["id"]}/verified'>{locales["sf"]["verified"][rlang]}</a> ")
+    parts.append(f"<a class='badge sec {"p" if rsf == "/" else "w"}' href='/{rlang}/{author.id}/'>{locales["sf"]["new"][rlang]}</a> ")
+    parts.append(f"<a class='badge sec {"p" if rsf == "awaiting" else "w"}' href='/{rlang}/{author.id}/awaiting'>{locales["sf"]["awaiting"][rlang]}</a> ")
+    parts.append(f"<a class='badge sec {"p" if rsf == "verified" else "w"}' href='/{rlang}/{author.id}/verified'>{locales["sf"]["verified"][rlang]}</a> ")
     parts.append('</p>')
 
-    for x in posts:
-        parts.append(render_post_item(x,author, rlang, rsf, locales))
-
-    html_block = "\n".join(parts)
+    for x in page1:
+        parts.append(post_item(x,author, rlang, rsf, locales))
+
+    # the rest of the listing is loaded on scroll, as in the main feeds
+    html_block = f'<script src="{asset_urls()["/assets/heatmap.js"]}" defer></script>\n'
+    if npages > 1 and json_feeds:
+        config = feed_config(npages, rlang, rsf, locales, {"feed": author_feed_path(author, rsf)})
+        html_block += FEED_SCRIPT_JSON.format(config=config, cards=asset_urls()["/assets/cards.js"], src=asset_urls()["/assets/feed.js"])
+    elif npages > 1:
+        html_block += FEED_SCRIPT_HTML.format(npages=npages)
+    html_block = html_block + "\n".join(parts)
 
-    rout = f"/{author["id"]}{torsf(rsf)}"
+    rout = f"/{author.id}{torsf(rsf)}"
     meta = {
         "rlang":rlang,
-        "title":author["name."+rlang] + " | "  + (locales["titles"]["prpr"][rlang] if rsf == "/" else locales["titles"][rsf][rlang]),
-        "canonical":f"{rlang}/{author["id"]}/"
+        "title":author.name[li] + " | "  + (locales["titles"]["prpr"][rlang] if rsf == "/" else locales["titles"][rsf][rlang]),
+        "canonical":f"{rlang}/{author.id}/"
     }
 
-    html_doc = create_base(html_block, meta, rlang, locales, rout)
+    html_doc = base_segments(html_block, meta, rlang, locales, rout)
 
-    output_file = Path(f"./public/{rlang}/{author["id"]}{torsf(rsf)}index.html")
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    output_file.write_text(html_doc, encoding="utf-8")    
+    return [write_page(f"./public/{rlang}/{author.id}{torsf(rsf)}index.html", html_doc)]
+
+
+def create_author_fragment(author, page, i, rlang, rsf, locales):
+    page_block = "\n".join(post_item(x, author, rlang, rsf, locales) for x in page)
+    return [write_page(f"./public/{rlang}/{author.id}{torsf(rsf)}{i}.html", page_block)]
+
+
+def create_author_shard(author, page, i, rsf):
+    ids = [x.id for x in page]
+    return [write_page(f"./public{author_feed_path(author, rsf)}/{i}.json", json.dumps(ids))]
 
 
 def create_ranking_page(stat, ranking, rlang, rsf, locales):
@@ -368,16 +999,13 @@ def create_ranking_page(stat, ranking, rlang, rsf, locales):
         "canonical":f"{rlang}"
     }
 
-    html_doc = create_base(html_block, meta, rlang, locales, rout)
+    html_doc = base_segments(html_block, meta, rlang, locales, rout)
 
-    output_file = Path(f"./public/{rlang}{torsf(rsf)}index.html")
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    output_file.write_text(html_doc, encoding="utf-8")  
+    files = [write_page(f"./public/{rlang}{torsf(rsf)}index.html", html_doc)]
 
     if rlang == "ru" and rsf == "/":
-        output_file = Path(f"./public/{torsf(rsf)}index.html")
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        output_file.write_text(html_doc, encoding="utf-8")  
+        files.append(write_page(f"./public/{torsf(rsf)}index.html", html_doc))
+    return files
 
 
 def create_authors_page(stat, authors, rlang, locales):
@@ -401,42 +1029,52 @@ def create_authors_page(stat, authors, rlang, locales):
         "canonical":f"{rlang}{rout}"
     }
 
-    html_doc = create_base(html_block, meta, rlang, locales, rout)
+    html_doc = base_segments(html_block, meta, rlang, locales, rout)
 
-    output_file = Path(f"./public/{rlang}/authors/index.html")
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    output_file.write_text(html_doc, encoding="utf-8")     
+    return [write_page(f"./public/{rlang}/authors/index.html", html_doc)]
 
 
-def create_mainfeed_page(authors, posts, stat, rlang, rsf, locales):
-    nb = 100
-    pages = [posts[i:i+nb] for i in range(0, len(posts), nb)]
-    page1 = pages[0]
+def paginate(posts, nb=100):
+    return [posts[i:i+nb] for i in range(0, len(posts), nb)]
 
-    parts = []
-    # stat
-    parts.append("<article>")
-    parts.append(render_stat(stat,["total_authors", "total_posts","total_verified","success_pct"],locales,rlang, True,"total_posts"))
-    parts.append("</article>")
 
-    #
-    parts.append('<p class="fnav" style="padding-left: 1em">')
-    parts.append(f"<a class='badge sec {"p" if rsf == "new" else "w"}' href='/{rlang}/new'>{locales["sf"]["new"][rlang]}</a>")
-    parts.append(f"<a class='badge sec {"p" if rsf == "awaiting" else "w"}' href='/{rlang}/awaiting'>{locales["sf"]["awaiting"][rlang]}</a> ")
-    parts.append(f"<a class='badge sec {"p" if rsf == "verified" else "w"}' href='/{rlang}/verified'>{locales["sf"]["verified"][rlang]}</a> ")
-    parts.append('</p>')
+# archive mode: a feed after its first page is split by month of the date it
+# is sorted by, so a new post changes the first page and its own month only
+ARCHIVE_KEYS = {
+    "new": attrgetter("time_statement"),
+    "awaiting": attrgetter("time_awaiting"),
+    "verified": attrgetter("time_verified"),
+}
+
+
+def paginate_months(posts, key, nb=100):
+    """posts in feed order -> (pages, names). The first page takes whole
+    months until it holds at least nb posts; every later month is a page
+    named YYYY-MM ("undated" for posts without the date)."""
+    pages = []
+    names = []
+    for x in posts:
+        d = key(x)
+        month = d.isoformat()[:7] if d else "undated"
+        if names and names[-1] == month:
+            pages[-1].append(x)
+        elif len(pages) == 1 and len(pages[0]) < nb:
+            pages[0].append(x)
+            names[0] = month
+        else:
+            pages.append([x])
+            names.append(month)
+    return pages, [1] + names[1:]
 
-    for x in page1:
-        parts.append(render_post_item(x,authors[x["author-id"]], rlang, rsf, locales))
 
-    html_block = f"""
+FEED_SCRIPT_HTML = """
     <script>
     document.addEventListener('DOMContentLoaded', () => {{
         let currentPage = 1;
         let flag = true;
 
         window.addEventListener('scroll', () => {{
-            if (window.innerHeight*3.0 + window.scrollY >= document.documentElement.scrollHeight && currentPage < {len(pages)} && flag) {{
+            if (window.innerHeight*3.0 + window.scrollY >= document.documentElement.scrollHeight && currentPage < {npages} && flag) {{
                 flag = false
                 fetch(`${{currentPage + 1}}.html`)
                     .then(response => {{
@@ -458,6 +1096,60 @@ def create_mainfeed_page(authors, posts, stat, rlang, rsf, locales):
     </script>    
     """
 
+FEED_SCRIPT_ARCHIVE = FEED_SCRIPT_HTML.replace(
+    "let currentPage = 1;", "const names = {names};\n        let currentPage = 1;").replace(
+    "${{currentPage + 1}}.html", "${{names[currentPage]}}.html")
+
+FEED_SCRIPT_JSON = """
+    <script type="application/json" id="feed-config">{config}</script>
+    <script src="{cards}" defer></script>
+    <script src="{src}" defer></script>
+    """
+
+
+def feed_config(npages, rlang, rsf, locales, extra=None):
+    config = {
+        "lang": rlang,
+        "rsf": rsf,
+        "pages": npages,
+        "labels": {x: locales[x][rlang] for x in STATUSES},
+        "colors": {x: status_color(x) for x in STATUSES},
+    }
+    config.update(extra or {})
+    return json.dumps(config, ensure_ascii=False, separators=(',', ':')).replace("</", "<\\/")
+
+
+def create_mainfeed_page(authors, page1, names, stat, rlang, rsf, locales, json_feeds=False, search=False):
+    # names: one per page, page numbers or archive months
+    npages = len(names)
+    archive = names != list(range(1, npages + 1))
+
+    parts = []
+    # stat
+    parts.append("<article>")
+    parts.append(render_stat(stat,["total_authors", "total_posts","total_verified","success_pct"],locales,rlang, True,"total_posts"))
+    parts.append("</article>")
+
+    #
+    parts.append('<p class="fnav" style="padding-left: 1em">')
+    parts.append(f"<a class='badge sec {"p" if rsf == "new" else "w"}' href='/{rlang}/new'>{locales["sf"]["new"][rlang]}</a>")
+    parts.append(f"<a class='badge sec {"p" if rsf == "awaiting" else "w"}' href='/{rlang}/awaiting'>{locales["sf"]["awaiting"][rlang]}</a> ")
+    parts.append(f"<a class='badge sec {"p" if rsf == "verified" else "w"}' href='/{rlang}/verified'>{locales["sf"]["verified"][rlang]}</a> ")
+    if search:
+        parts.append(f"<a class='badge sec w' href='/{rlang}/search/'>{locales["sf"]["search"][rlang]}</a> ")
+    parts.append('</p>')
+
+    for x in page1:
+        parts.append(post_item(x,authors[x.author_id], rlang, rsf, locales))
+
+    if json_feeds:
+        config = feed_config(npages, rlang, rsf, locales, {"names": names} if archive else None)
+        html_block = FEED_SCRIPT_JSON.format(config=config, cards=asset_urls()["/assets/cards.js"], src=asset_urls()["/assets/feed.js"])
+    elif archive:
+        html_block = FEED_SCRIPT_ARCHIVE.format(npages=npages, names=json.dumps(names))
+    else:
+        html_block = FEED_SCRIPT_HTML.format(npages=npages)
+
     html_block = html_block + "\n".join(parts)
     
     rout = f"{torsf(rsf)}"
@@ -467,23 +1159,132 @@ def create_mainfeed_page(authors, posts, stat, rlang, rsf, locales):
         "canonical":f"{rlang}{rout}"
     }
 
-    html_doc = create_base(html_block, meta, rlang, locales, rout)
+    html_doc = base_segments(html_block, meta, rlang, locales, rout)
 
-    output_file = Path(f"./public/{rlang}{torsf(rsf)}index.html")
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    output_file.write_text(html_doc, encoding="utf-8")
+    return [write_page(f"./public/{rlang}{torsf(rsf)}index.html", html_doc)]
 
+
+def create_mainfeed_fragment(authors, page, name, rlang, rsf, locales):
     page_parts = []
-    i = 2
-    for p in pages[1:]:
-        page_parts = []
-        for x in p:
-            page_parts.append(render_post_item(x,authors[x["author-id"]], rlang, rsf, locales))
-        page_block = "\n".join(page_parts)
-        output_file = Path(f"./public/{rlang}{torsf(rsf)}{i}.html")
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        output_file.write_text(page_block, encoding="utf-8") 
-        i = i + 1       
+    for x in page:
+        page_parts.append(post_item(x,authors[x.author_id], rlang, rsf, locales))
+    page_block = "\n".join(page_parts)
+    return [write_page(f"./public/{rlang}{torsf(rsf)}{name}.html", page_block)]
+
+
+def create_mainfeed_shard(page, name, rsf):
+    ids = [x.id for x in page]
+    return [write_page(f"./public/feed/{rsf}/{name}.json", json.dumps(ids))]
+
+
+def post_store_entry(post, author, rlang):
+    li = LANG_INDEX[rlang]
+    return {
+        "a": author.id,
+        "n": author.name[li],
+        "t": post.time_statement.isoformat(),
+        "d": human_date(post.time_statement,rlang),
+        "l": suplang(post.original_language,rlang),
+        "s": post.statement[li].replace('\n', '<br>').rstrip('.'),
+        "c": post.context[li].rstrip('.') if post.context[li].strip() != "" else "",
+        "st": STATUSES[post.status],
+        "aw": human_date(post.time_awaiting,rlang) if post.time_awaiting else "",
+        "vf": human_date(post.time_verified,rlang) if post.time_verified else "",
+    }
+
+
+def create_post_store(authors, posts, bucket, rlang):
+    data = {x.id: post_store_entry(x, authors[x.author_id], rlang) for x in posts}
+    return [write_page(f"./public/{rlang}/store/{bucket}.json", json.dumps(data, ensure_ascii=False, separators=(',', ':')))]
+
+
+# full-text search: each post is reduced to its set of terms, and the inverted
+# index is split by the first two characters of a term so that a query only
+# downloads the shards its words fall in
+SEARCH_TERM_RE = re.compile(r'[^\W_]+')
+SEARCH_MIN_TERM = 2
+SEARCH_CACHE_PATH = "./.cache/search.json"
+SEARCH_VERSION = 1
+
+
+def search_terms(post):
+    # same normalization as tokens() in assets/search.js
+    text = " ".join(html.unescape(x) for field in (post.statement, post.context, post.title) for x in field).lower().replace('ё', 'е')
+    return sorted({t for t in SEARCH_TERM_RE.findall(text) if len(t) >= SEARCH_MIN_TERM})
+
+
+def search_shard_name(term):
+    return "-".join(f"{ord(c):x}" for c in term[:2])
+
+
+def load_search_cache(path=SEARCH_CACHE_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == SEARCH_VERSION:
+            return data["posts"]
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_search_cache(cache, path=SEARCH_CACHE_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({"version": SEARCH_VERSION, "posts": cache}, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(f"{path}.tmp", path)
+
+
+def build_search_index(posts, hashes, cache):
+    # only posts whose node hash changed are tokenized again; the cache is
+    # rewritten in place and keeps no entries for deleted posts
+    index = {}
+    for pid in list(cache):
+        if pid not in posts:
+            del cache[pid]
+    for pid, p in posts.items():
+        entry = cache.get(pid)
+        if entry is None or entry[0] != hashes[pid]:
+            entry = [hashes[pid], search_terms(p)]
+            cache[pid] = entry
+        for t in entry[1]:
+            index.setdefault(t, []).append(int(pid))
+    shards = {}
+    for t in sorted(index):
+        ids = sorted(index[t])
+        # postings are delta-encoded: the first id, then gaps
+        shards.setdefault(search_shard_name(t), {})[t] = [b - a for a, b in zip([0] + ids, ids)]
+    return shards
+
+
+def create_search_shard(shard, name):
+    return [write_page(f"./public/search/{name}.json", json.dumps(shard, ensure_ascii=False, separators=(',', ':')))]
+
+
+def create_search_page(rlang, locales):
+    parts = []
+    parts.append("<article>")
+    parts.append("<form id='search-form' role='search'>")
+    parts.append(f"<input type='search' id='search-q' name='q' placeholder='{locales["search"]["placeholder"][rlang]}' aria-label='{locales["sf"]["search"][rlang]}' autofocus>")
+    parts.append("</form>")
+    parts.append("</article>")
+    parts.append("<div id='search-results'></div>")
+
+    config = feed_config(0, rlang, "search", locales, {"found": locales["search"]["found"][rlang]})
+    # the search page is configured like a JSON feed page, with its own script
+    html_block = FEED_SCRIPT_JSON.format(config=config, cards=asset_urls()["/assets/cards.js"], src=asset_urls()["/assets/search.js"])
+    html_block = html_block + "\n".join(parts)
+
+    rout = "/search/"
+    meta = {
+        "rlang":rlang,
+        "title":locales["titles"]["search"][rlang],
+        "canonical":f"{rlang}{rout}"
+    }
+
+    html_doc = base_segments(html_block, meta, rlang, locales, rout)
+
+    return [write_page(f"./public/{rlang}/search/index.html", html_doc)]
 
 
 def create_about_page(rlang, locales):
@@ -505,43 +1306,41 @@ def create_about_page(rlang, locales):
         "canonical":f"{rlang}{rout}"
     }
 
-    html_doc = create_base(html_block, meta, rlang, locales, rout)
+    html_doc = base_segments(html_block, meta, rlang, locales, rout)
 
-    output_file = Path(f"./public/{rlang}/about/index.html")
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    output_file.write_text(html_doc, encoding="utf-8")
+    return [write_page(f"./public/{rlang}/about/index.html", html_doc)]
 
 
-def create_base(html_block, meta, rlang, locales, rout):
-    html_doc = f"""
+def shell_template(rlang, locales, assets, slot):
+    return f"""
     <!doctype html>
     <html lang="{rlang}" data-theme="light">
     <head>
         <meta charset="utf-8">
         <meta name="viewport" content="width=device-width, initial-scale=1">
         
-        <title>{meta['title']}</title>
-        <link rel="canonical" href="https://screenshot.report/{meta["canonical"]}">
-        <link rel="alternate" hreflang="ru" href="https://screenshot.report/ru{rout}" />
-        <link rel="alternate" hreflang="en" href="https://screenshot.report/en{rout}" />        
-
-        <link rel="icon" href="/favicon.ico?v=16" sizes="32x32">
-        <link rel="icon" href="/icon.svg?v=16" type="image/svg+xml">
-        <link rel="apple-touch-icon" href="/apple-touch-icon.png?v=16">
-        <link rel="manifest" href="/manifest.webmanifest?v=16"> 
-
-        <link rel="stylesheet" href="/assets/pico.min.css">
-        <link rel="stylesheet" href="/assets/my.css">
+        <title>{slot("title")}</title>
+        <link rel="canonical" href="https://screenshot.report/{slot("canonical")}">
+        <link rel="alternate" hreflang="ru" href="https://screenshot.report/ru{slot("rout")}" />
+        <link rel="alternate" hreflang="en" href="https://screenshot.report/en{slot("rout")}" />        
+
+        <link rel="icon" href="{assets["/favicon.ico"]}" sizes="32x32">
+        <link rel="icon" href="{assets["/icon.svg"]}" type="image/svg+xml">
+        <link rel="apple-touch-icon" href="{assets["/apple-touch-icon.png"]}">
+        <link rel="manifest" href="{assets["/manifest.webmanifest"]}"> 
+
+        <link rel="stylesheet" href="{assets["/assets/pico.min.css"]}">
+        <link rel="stylesheet" href="{assets["/assets/my.css"]}">
     </head>
     <body class="bgc">
         <header class="container">
             <article style="position: relative;">
                 <h1 style="margin-bottom:0;"><a href="/{rlang}">screenshot</a></h1>
-                <p class="fnav" style="margin-bottom:0; margin-top:0;">{locales["ppm"][rlang]} <span class="no-break">| <a class=" {"bold" if rlang=="ru" else ""}" href="/ru{rout}">ru</a> | <a class=" {"bold" if rlang=="en" else ""}" href="/en{rout}">en</a></span></p>
+                <p class="fnav" style="margin-bottom:0; margin-top:0;">{locales["ppm"][rlang]} <span class="no-break">| <a class=" {"bold" if rlang=="ru" else ""}" href="/ru{slot("rout")}">ru</a> | <a class=" {"bold" if rlang=="en" else ""}" href="/en{slot("rout")}">en</a></span></p>
                 <p class="fnav" style="margin-bottom:0; margin-top:8px;">
-                <span><a class="badge sec {"p "if rout=='/' else "w"}" href="/{rlang}/">{locales["rating"][rlang]}</a></span>
-                <span><a class="badge sec {"p" if rout in ['/new/','/awaiting/','/verified/'] else "w"}" href="/{rlang}/new">{locales["predictions"][rlang]}</a></span>
-                <span><a class="badge sec {"p "if rout=='/authors/' else "w"}" href="/{rlang}/authors">{locales["authors"][rlang]}</a></span>
+                <span><a class="badge sec {slot("nav_rating")}" href="/{rlang}/">{locales["rating"][rlang]}</a></span>
+                <span><a class="badge sec {slot("nav_predictions")}" href="/{rlang}/new">{locales["predictions"][rlang]}</a></span>
+                <span><a class="badge sec {slot("nav_authors")}" href="/{rlang}/authors">{locales["authors"][rlang]}</a></span>
                 </p>
 
                 <a style="top:4px; right:12px;" class="gh" rel="noopener noreferrer" class="contrast" aria-label="Telegram Channel" href="https://t.me/screenshotru" target="_blank">
@@ -567,29 +1366,140 @@ def create_base(html_block, meta, rlang, locales, rout):
         <main class="container">
             <section class="grid">
                 <div id="abc">
-                    {html_block}
+                    {slot("html_block")}
                 </div>
             </section>
         </main>
-    {"""<a class="to-top" onclick='window.scrollTo({top: 0})' aria-label="up">↑</a>""" if rout not in ['/','/about/'] else ''}
+    {slot("to_top")}
     
     <!-- 100% privacy-first analytics -->
-    <script async src="https://scripts.simpleanalyticscdn.com/latest.js"></script>
+    <script async src="https://scripts.simpleanalyticscdn.com/latest.js"></script>{SW_REGISTER if "/sw.js" in assets else ""}
 
     </body>
     </html>
     """ 
-    return html_doc   
+
+
+# asset references emitted into pages; --fingerprint swaps them for
+# content-hashed copies that can be cached forever
+DEFAULT_ASSET_URLS = {
+    "/favicon.ico": "/favicon.ico?v=16",
+    "/icon.svg": "/icon.svg?v=16",
+    "/apple-touch-icon.png": "/apple-touch-icon.png?v=16",
+    "/manifest.webmanifest": "/manifest.webmanifest?v=16",
+    "/assets/pico.min.css": "/assets/pico.min.css",
+    "/assets/my.css": "/assets/my.css",
+    "/assets/cards.js": "/assets/cards.js",
+    "/assets/feed.js": "/assets/feed.js",
+    "/assets/search.js": "/assets/search.js",
+    "/assets/heatmap.js": "/assets/heatmap.js",
+}
+
+ASSET_DIRS = [("./ssg/aux/assets", "/assets/"), ("./ssg/aux/favicon", "/")]
+
+
+def asset_urls():
+    return RENDER_STATE.get("assets", DEFAULT_ASSET_URLS)
+
+
+def fingerprint_assets():
+    # hashed copies are written next to the originals, which stay in place
+    # for /favicon.ico and other well-known URLs
+    urls = dict(DEFAULT_ASSET_URLS)
+    files = []
+    sources = [(os.path.join(src, name), prefix + name) for src, prefix in ASSET_DIRS for name in sorted(os.listdir(src))]
+    # the web manifest goes last: it refers to the icons by URL
+    sources.sort(key=lambda x: x[1].endswith(".webmanifest"))
+    for path, url in sources:
+        data = Path(path).read_bytes()
+        if url.endswith(".webmanifest"):
+            manifest = json.loads(data)
+            for icon in manifest.get("icons", []):
+                icon["src"] = urls.get(icon["src"], icon["src"])
+            data = json.dumps(manifest, indent=2).encode("utf-8")
+        stem, ext = os.path.splitext(url)
+        urls[url] = f"{stem}.{hashlib.sha1(data).hexdigest()[:10]}{ext}"
+        files.append(write_output(f"./public{urls[url]}", data))
+    return urls, files
+
+
+# --service-worker: /sw.js precaches the assets the pages reference, keyed by
+# content hash, and serves pages and feed fragments stale-while-revalidate
+SW_TEMPLATE_PATH = "./ssg/aux/sw.js"
+SW_REGISTER = """
+    <script>if ('serviceWorker' in navigator) navigator.serviceWorker.register('/sw.js');</script>"""
+
+
+def create_service_worker(assets):
+    # run after the assets are in ./public: the hashes are of the served files
+    precache = {url: file_hash(f"./public{url.split('?')[0]}")[:10] for url in sorted(set(assets.values()) - {"/sw.js"})}
+    with open(SW_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        template = f.read()
+    return write_page("./public/sw.js", template.replace("__PRECACHE__", json.dumps(precache, indent=1)))
+
+
+def create_assets(fingerprint=False, service_worker=False):
+    """Copy the static files into ./public; returns (asset URLs, files)."""
+    static_files = []
+    static_files += copy_outputs("./ssg/aux/assets", './public/assets')
+    static_files += copy_outputs("./ssg/aux/favicon/", './public/')
+    static_files += copy_outputs("./ssg/aux/robots.txt", "./public/")
+    static_files += copy_outputs("./ssg/aux/CNAME", "./public/")
+    assets = DEFAULT_ASSET_URLS
+    if fingerprint:
+        assets, fingerprinted = fingerprint_assets()
+        static_files += fingerprinted
+    if service_worker:
+        assets = {**assets, "/sw.js": "/sw.js"}
+        static_files.append(create_service_worker(assets))
+    return assets, static_files
+
+
+# the page shell is compiled once per language into constant segments and
+# named slots; a page is the segments joined with its slot values
+SHELL_CACHE = {}
+
+def compile_shell(rlang, locales, assets):
+    cached = SHELL_CACHE.get(rlang)
+    if cached is not None and cached[0] is locales and cached[1] is assets:
+        return cached[2]
+    parts = shell_template(rlang, locales, assets, lambda name: f"\x00{name}\x00").split("\x00")
+    slots = [(i, parts[i]) for i in range(1, len(parts), 2)]
+    SHELL_CACHE[rlang] = (locales, assets, (parts, slots))
+    return parts, slots
+
+
+def shell_slots(html_block, meta, rout):
+    return {
+        "title": meta["title"],
+        "canonical": meta["canonical"],
+        "rout": rout,
+        "nav_rating": "p " if rout == '/' else "w",
+        "nav_predictions": "p" if rout in ['/new/','/awaiting/','/verified/'] else "w",
+        "nav_authors": "p " if rout == '/authors/' else "w",
+        "to_top": """<a class="to-top" onclick='window.scrollTo({top: 0})' aria-label="up">↑</a>""" if rout not in ['/','/about/'] else '',
+        "html_block": html_block,
+    }
+
+
+def base_segments(html_block, meta, rlang, locales, rout):
+    parts, slots = compile_shell(rlang, locales, asset_urls())
+    values = shell_slots(html_block, meta, rout)
+    segments = parts[:]
+    for i, name in slots:
+        segments[i] = values[name]
+    return segments
 
 
 
 
-def _create_url_entry(base_url, ru_path, en_path, x_default_path):
+def _create_url_entry(base_url, ru_path, en_path, x_default_path, lastmod=None):
     ru_url = f"{base_url}{ru_path}"
     en_url = f"{base_url}{en_path}"
     x_default_url = f"{base_url}{x_default_path}"
 
     hreflangs = (
+        (f'    <lastmod>{lastmod}</lastmod>\n' if lastmod else '') +
         f'    <xhtml:link rel="alternate" hreflang="ru" href="{ru_url}" />\n'
         f'    <xhtml:link rel="alternate" hreflang="en" href="{en_url}" />\n'
         f'    <xhtml:link rel="alternate" hreflang="x-default" href="{x_default_url}" />\n'
@@ -611,110 +1521,1169 @@ def _create_url_entry(base_url, ru_path, en_path, x_default_path):
     
     return ru_entry + en_entry
 
-def generate_sitemap_string(authors_list, base_url="https://screenshot.report"):    
-    xml_parts = [
-        '<?xml version="1.0" encoding="UTF-8"?>\n',
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" ',
-        'xmlns:xhtml="http://www.w3.org/1999/xhtml">\n'
-    ]
 
-    #
-    xml_parts.append(_create_url_entry(base_url, "/ru/", "/en/", "/en/"))
+# the sitemap is an index over shards: site pages, authors and posts per
+# thousand-bucket of ids. A shard entry is (path, lastmod) and becomes a ru
+# and an en URL, so a shard holds at most 2 * 3 * 1000 URLs, well below the
+# protocol's 50,000
+SITEMAP_BASE_URL = "https://screenshot.report"
+LASTMOD_PATH = "./.cache/lastmod.json"
+# bump to seed every date again; 2: dates seeded from a shallow clone were
+# all the date of its one commit
+LASTMOD_VERSION = 2
+
+
+def sitemap_urlset(entries, base_url=SITEMAP_BASE_URL):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+    yield 'xmlns:xhtml="http://www.w3.org/1999/xhtml">\n'
+    for path, lastmod in entries:
+        yield _create_url_entry(base_url, f"/ru{path}", f"/en{path}", f"/en{path}", lastmod)
+    yield '</urlset>'
+
+
+def sitemap_index(shards, base_url=SITEMAP_BASE_URL):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for name, lastmod in shards:
+        yield f'  <sitemap>\n    <loc>{base_url}/{name}.xml</loc>\n    <lastmod>{lastmod}</lastmod>\n  </sitemap>\n'
+    yield '</sitemapindex>'
+
+
+def create_sitemap_shard(name, entries):
+    return [write_page(f"./public/{name}.xml", sitemap_urlset(entries))]
+
+
+def create_sitemap(shards):
+    return [write_page(f"./public/sitemap.xml", sitemap_index(shards))]
+
+
+def sitemap_pages(site, about):
+    entries = [("/", site)]
+    for page in ["about", "authors", "new", "awaiting", "verified"]:
+        entries.append((f"/{page}", about if page == "about" else site))
+    return entries
+
+
+def sitemap_shards(authors, posts, lastmod):
+    """Shard name -> [(path, lastmod)]; a page's lastmod is the latest change
+    of the source files it is rendered from."""
+    site = max(lastmod.values(), default="")
+    about = max(lastmod.get(f"about:{rlang}", "") for rlang in LANGS)
+    shards = {"sitemap-pages": sitemap_pages(site, about)}
+    for a in authors:
+        aid = a.id
+        latest = max([lastmod[f"author:{aid}"]] + [lastmod[f"post:{x.id}"] for x in a.posts])
+        entries = shards.setdefault(f"sitemap-authors-{thousand_bucket(int(aid))}", [])
+        entries += [(f"/{aid}", latest), (f"/{aid}/awaiting", latest), (f"/{aid}/verified", latest)]
+    for p in posts:
+        pid, aid = p.id, p.author_id
+        d = max(lastmod[f"author:{aid}"], lastmod[f"post:{pid}"])
+        shards.setdefault(f"sitemap-posts-{thousand_bucket(int(pid))}", []).append((f"/{aid}/{pid}", d))
+    return {k: shards[k] for k in sorted(shards, key=natural_key)}
+
+
+def source_path(name):
+    kind, key = name.split(":", 1)
+    if kind == "about":
+        return f"ssg/aux/about/about.{key}.html"
+    return f"data/{kind}s/{thousand_bucket(int(key))}/{key}.md"
+
+
+def git_lastmod():
+    # one pass over the history: the first time a path shows up is its
+    # latest commit. A shallow clone lists every file under its boundary
+    # commit, so it gives no dates and the file mtimes are used instead
+    try:
+        shallow = subprocess.run(["git", "rev-parse", "--is-shallow-repository"], capture_output=True, text=True, check=True).stdout.strip()
+        if shallow != "false":
+            return {}
+        out = subprocess.run(["git", "log", "--format=%x00%cs", "--name-only", "--no-renames", "--", "data", "ssg/aux/about"],
+                             capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    dates = {}
+    for commit in out.split("\x00")[1:]:
+        date, _, names = commit.partition("\n")
+        for name in names.split():
+            dates.setdefault(name, date)
+    return dates
+
+
+def load_lastmod(path=LASTMOD_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == LASTMOD_VERSION:
+            return data["dates"]
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_lastmod(cache, path=LASTMOD_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({"version": LASTMOD_VERSION, "dates": cache}, f, separators=(',', ':'))
+    os.replace(f"{path}.tmp", path)
+
+
+def first_lastmod(name, seed, today):
+    # seed: git_lastmod()
+    date = seed.get(source_path(name))
+    if date is None:
+        try:
+            date = datetime.fromtimestamp(os.stat(source_path(name)).st_mtime, timezone.utc).date().isoformat()
+        except OSError:
+            date = today
+    return date
+
+
+def track_lastmod(nodes, names, cache):
+    """Node name -> date its content last changed. The date is carried over
+    while the node's hash stays the same; a changed node gets today's date,
+    and one seen for the first time the date of its last commit (or its
+    file's mtime outside a git checkout). cache is updated in place."""
+    today = datetime.now(timezone.utc).date().isoformat()
+    seed = None
+    res = {}
+    for name in names:
+        entry = cache.get(name)
+        if entry is None:
+            if seed is None:
+                seed = git_lastmod()
+            entry = [nodes[name], first_lastmod(name, seed, today)]
+        elif entry[0] != nodes[name]:
+            entry = [nodes[name], today]
+        res[name] = entry
+    cache.clear()
+    cache.update(res)
+    return {k: v[1] for k, v in res.items()}
+
+
+def sort_new(posts):
+    return sorted(posts, key=lambda x: (x.time_statement or date.max, x.id), reverse=True)
+
+def sort_awaiting(posts):
+    return sorted([item for item in posts if item.status == AWAITING], key=lambda x: (x.time_awaiting or date.max, x.id))
+
+def sort_verified(posts):
+    return sorted([item for item in posts if item.status != AWAITING], key=lambda x: (x.time_verified or date.max, x.id), reverse=True)
+
+
+def node_hash(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+# render tasks are small tuples resolved against the site state, so they can be
+# shipped to worker processes; the state itself is handed over once per worker
+RENDER_STATE = {}
+
+def set_render_state(state):
+    global RENDER_STATE
+    RENDER_STATE = state
+
+
+def render_task(task):
+    s = RENDER_STATE
+    kind = task[0]
+    if kind == "post":
+        _, pid, rlang = task
+        p = s["posts"][pid]
+        return create_post_page(p, s["authors"][p.author_id], rlang, s["locales"])
+    if kind == "author":
+        _, aid, rsf, i, rlang = task
+        pages = s["author_feeds"][aid][rsf]
+        if i == 1:
+            return create_author_page(s["authors"][aid], pages[0], len(pages), rlang, rsf, s["locales"], s["json_feeds"])
+        return create_author_fragment(s["authors"][aid], pages[i-1], i, rlang, rsf, s["locales"])
+    if kind == "author-shard":
+        _, aid, rsf, i = task
+        return create_author_shard(s["authors"][aid], s["author_feeds"][aid][rsf][i-1], i, rsf)
+    if kind == "feed":
+        _, rsf, i, rlang = task
+        pages = s["feeds"][rsf]
+        names = s["feed_names"][rsf]
+        if i == 1:
+            return create_mainfeed_page(s["authors"], pages[0], names, s["main_stat"], rlang, rsf, s["locales"], s["json_feeds"], s["search"])
+        return create_mainfeed_fragment(s["authors"], pages[i-1], names[i-1], rlang, rsf, s["locales"])
+    if kind == "shard":
+        _, rsf, i = task
+        return create_mainfeed_shard(s["feeds"][rsf][i-1], s["feed_names"][rsf][i-1], rsf)
+    if kind == "store":
+        _, bucket, rlang = task
+        return create_post_store(s["authors"], s["buckets"][bucket], bucket, rlang)
+    if kind == "search":
+        _, name = task
+        return create_search_shard(s["search_shards"][name], name)
+    if kind == "search-page":
+        _, rlang = task
+        return create_search_page(rlang, s["locales"])
+    if kind == "ranking":
+        _, rlang, rsf = task
+        return create_ranking_page(s["main_stat"], s["main_ranking"], rlang, rsf, s["locales"])
+    if kind == "authors":
+        _, rlang = task
+        return create_authors_page(s["main_stat"], s["posts_ranking"], rlang, s["locales"])
+    if kind == "about":
+        _, rlang = task
+        return create_about_page(rlang, s["locales"])
+    if kind == "sitemap":
+        _, name = task
+        return create_sitemap_shard(name, s["sitemaps"][name])
+    if kind == "sitemap-index":
+        return create_sitemap([(k, max(d for _, d in v)) for k, v in s["sitemaps"].items()])
+    raise ValueError(f"unknown render task {task!r}")
+
+
+def render_task_profiled(task):
+    files0, bytes0 = WRITE_STATS["files"], WRITE_STATS["bytes"]
+    start = time.perf_counter()
+    files = render_task(task)
+    return files, time.perf_counter() - start, WRITE_STATS["files"] - files0, WRITE_STATS["bytes"] - bytes0
+
+
+# post cards are shared by the main feeds and the author pages; each distinct
+# card is rendered once and memoized under (post id, lang, variant) together
+# with a hash of everything it is rendered from
+FRAGMENTS_VERSION = 1
+
+def post_item_variant(post, rsf):
+    # the only rsf-dependent part of render_post_item is the date badge
+    if rsf == "awaiting" and post.status == AWAITING and post.time_awaiting:
+        return "awaiting"
+    if rsf == "verified" and post.status != AWAITING and post.time_verified:
+        return "verified"
+    return ""
+
+
+def post_item(post, author, rlang, rsf, locales):
+    fragments = RENDER_STATE.get("fragments")
+    if fragments is None:
+        return render_post_item(post, author, rlang, rsf, locales)
+    key = f'{post.id}|{rlang}|{post_item_variant(post, rsf)}'
+    h = RENDER_STATE["item_hashes"][post.id]
+    entry = fragments.get(key)
+    if entry is None or entry[0] != h:
+        entry = [h, render_post_item(post, author, rlang, rsf, locales)]
+        fragments[key] = entry
+    return entry[1]
+
+
+def fill_fragments(state, tasks):
+    # render the cards the pending pages need up front, so that worker
+    # processes only look them up and the parent can persist them
+    set_render_state(state)
+    for task in tasks:
+        if task[0] == "author":
+            _, aid, rsf, i, rlang = task
+            page = state["author_feeds"][aid][rsf][i-1]
+        elif task[0] == "feed":
+            _, rsf, i, rlang = task
+            page = state["feeds"][rsf][i-1]
+        else:
+            continue
+        for x in page:
+            post_item(x, state["authors"][x.author_id], rlang, rsf, state["locales"])
 
-    #
-    static_pages = ["about", "authors", "new", "awaiting", "verified"]
-    for page_slug in static_pages:
-        xml_parts.append(_create_url_entry(base_url, f"/ru/{page_slug}", f"/en/{page_slug}", f"/en/{page_slug}"))
 
-    #
-    for author in authors_list:
-        author_id = author['id']
-        
-        xml_parts.append(_create_url_entry(base_url, f"/ru/{author_id}", f"/en/{author_id}", f"/en/{author_id}"))
-        xml_parts.append(_create_url_entry(base_url, f"/ru/{author_id}/awaiting", f"/en/{author_id}/awaiting", f"/en/{author_id}/awaiting"))
-        xml_parts.append(_create_url_entry(base_url, f"/ru/{author_id}/verified", f"/en/{author_id}/verified", f"/en/{author_id}/verified"))
+def load_fragments(path=FRAGMENTS_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == FRAGMENTS_VERSION:
+            return data["items"]
+    except (OSError, ValueError):
+        pass
+    return {}
 
-        if 'posts' in author and author['posts']:
-            for post in author['posts']:
-                xml_parts.append(_create_url_entry(base_url,f"/ru/{author_id}/{post["id"]}",f"/en/{author_id}/{post["id"]}",f"/en/{author_id}/{post["id"]}"))
 
-    #
-    xml_parts.append('</urlset>')
-    
-    return "".join(xml_parts)
+def save_fragments(fragments, posts, path=FRAGMENTS_PATH):
+    items = {k: v for k, v in fragments.items() if k.split('|', 1)[0] in posts}
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({"version": FRAGMENTS_VERSION, "items": items}, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(f"{path}.tmp", path)
 
 
-def create_sitemap(authors):
-    xml_doc = generate_sitemap_string(authors, "https://screenshot.report")
-    output_file = Path(f"./public/sitemap.xml")
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    output_file.write_text(xml_doc, encoding="utf-8")
+class BuildProfile:
+    """Wall time, files and bytes written and peak memory per build phase.
+
+    Phases are consecutive steps of create_site(), each started by phase()
+    and ended by the next one or by end(). Rendering is also broken down by
+    render task kind (post, author, feed, ...) when enabled; task time is
+    summed over tasks, so it exceeds the phase's wall time with -j > 1.
+    """
 
+    def __init__(self, enabled=False, top=0):
+        self.enabled = enabled
+        self.phases = []
+        self.tasks = {}
+        self.top = top
+        self.current = None
+        self.profiler = None
+        self.start = time.perf_counter()
+        if enabled and top:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def phase(self, name):
+        self.end()
+        self.current = {"phase": name, "count": None, "files0": WRITE_STATS["files"], "bytes0": WRITE_STATS["bytes"], "t0": time.perf_counter()}
+
+    def count(self, n):
+        self.current["count"] = n
+
+    def end(self):
+        x = self.current
+        if x is None:
+            return
+        self.current = None
+        self.phases.append({
+            "phase": x["phase"],
+            "seconds": round(time.perf_counter() - x["t0"], 4),
+            "count": x["count"],
+            "files_written": WRITE_STATS["files"] - x["files0"],
+            "bytes_written": WRITE_STATS["bytes"] - x["bytes0"],
+            "peak_rss_mb": peak_rss_mb(),
+        })
+
+    def task(self, kind, seconds, nfiles, nbytes):
+        t = self.tasks.setdefault(kind, {"count": 0, "seconds": 0.0, "files_written": 0, "bytes_written": 0})
+        t["count"] += 1
+        t["seconds"] += seconds
+        t["files_written"] += nfiles
+        t["bytes_written"] += nbytes
+
+    def hot_functions(self):
+        if not self.profiler:
+            return []
+        self.profiler.disable()
+        stats = pstats.Stats(self.profiler)
+        rows = sorted(stats.stats.items(), key=lambda x: x[1][2], reverse=True)[:self.top]
+        return [{
+            "function": f"{os.path.basename(filename)}:{line}({name})",
+            "calls": nc,
+            "tottime": round(tt, 4),
+            "cumtime": round(ct, 4),
+        } for (filename, line, name), (cc, nc, tt, ct, callers) in rows]
+
+    def report(self, path=PROFILE_PATH):
+        self.end()
+        report = {
+            "total_seconds": round(time.perf_counter() - self.start, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "phases": self.phases,
+            "render": {k: dict(v, seconds=round(v["seconds"], 4)) for k, v in sorted(self.tasks.items())},
+            "hot_functions": self.hot_functions(),
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        os.replace(f"{path}.tmp", path)
+
+        print(f"{'phase':<24} {'seconds':>9} {'count':>8} {'files':>8} {'MB written':>10} {'peak MB':>8}")
+        for x in report["phases"]:
+            count = "" if x["count"] is None else x["count"]
+            print(f"{x['phase']:<24} {x['seconds']:>9.3f} {count:>8} {x['files_written']:>8} {x['bytes_written'] / 1e6:>10.2f} {x['peak_rss_mb']:>8.1f}")
+        for k, x in report["render"].items():
+            print(f"{'  render ' + k:<24} {x['seconds']:>9.3f} {x['count']:>8} {x['files_written']:>8} {x['bytes_written'] / 1e6:>10.2f}")
+        print(f"{'total':<24} {report['total_seconds']:>9.3f} {'':>8} {'':>8} {'':>10} {report['peak_rss_mb']:>8.1f}")
+        if report["hot_functions"]:
+            print(f"\n{'function':<60} {'calls':>9} {'tottime':>9} {'cumtime':>9}")
+            for x in report["hot_functions"]:
+                print(f"{x['function'][-60:]:<60} {x['calls']:>9} {x['tottime']:>9.3f} {x['cumtime']:>9.3f}")
+        print(f"profile written to {path}")
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS; worker
+    # processes are included once they have exited. There is no resource
+    # module on Windows, where 0 is reported
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) / scale, 1)
+
+
+class BuildGraph:
+    """Dependency graph from input nodes to output units.
+
+    Nodes are source files (posts, authors, locales, about pages) and derived
+    values (stats, rankings, feed pagination), each identified by a content hash.
+    An output unit is one or more files rendered together; it is re-rendered
+    only when the hashes of its dependencies differ from the previous build or
+    one of its files is missing.
+    """
 
-def create_site():
-    public_path = './public'
-    if os.path.exists(public_path):
-        shutil.rmtree(public_path)
-    shutil.copytree("./ssg/aux/assets", './public/assets')
-    shutil.copytree("./ssg/aux/favicon/", './public/', dirs_exist_ok=True)
-    shutil.copy("./ssg/aux/robots.txt", "./public/")
-    shutil.copy("./ssg/aux/CNAME", "./public/")
+    version = 1
+
+    def __init__(self, path=BUILD_GRAPH_PATH, incremental=False, prev_units=None):
+        self.path = path
+        self.nodes = {}
+        self.units = {}
+        self.prev_units = {}
+        self.pending = []
+        self.rendered = 0
+        self.skipped = 0
+        if prev_units is not None:
+            self.prev_units = prev_units
+        elif incremental:
+            self.prev_units = self.load(path)
+
+    @classmethod
+    def load(cls, path=BUILD_GRAPH_PATH):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                prev = json.load(f)
+            if prev.get("version") == cls.version:
+                return prev["units"]
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def node(self, name, value):
+        self.nodes[name] = node_hash(value)
+
+    def build(self, unit, deps, task):
+        sig = hashlib.sha1("\n".join([f"{d} {self.nodes[d]}" for d in deps]).encode('utf-8')).hexdigest()
+        prev = self.prev_units.get(unit)
+        if prev is not None and prev["sig"] == sig and all(os.path.exists(f) for f in prev["files"]):
+            self.units[unit] = prev
+            self.skipped += 1
+            return
+        self.pending.append((unit, deps, sig, task))
+
+    def render(self, state, jobs=1, profile=None):
+        tasks = [task for _, _, _, task in self.pending]
+        fn = render_task_profiled if profile is not None else render_task
+        if jobs > 1 and len(tasks) > 1:
+            ctx = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+            with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx, initializer=set_render_state, initargs=(state,)) as ex:
+                results = list(ex.map(fn, tasks, chunksize=max(1, len(tasks) // (jobs * 16))))
+            if profile is not None:
+                # count what the workers wrote as written by this build
+                WRITE_STATS["files"] += sum(r[2] for r in results)
+                WRITE_STATS["bytes"] += sum(r[3] for r in results)
+        else:
+            set_render_state(state)
+            results = [fn(task) for task in tasks]
+        if profile is not None:
+            for task, (_, seconds, nfiles, nbytes) in zip(tasks, results):
+                profile.task(task[0], seconds, nfiles, nbytes)
+            results = [r[0] for r in results]
+        for (unit, deps, sig, _), files in zip(self.pending, results):
+            self.units[unit] = {"deps": deps, "sig": sig, "files": files}
+        self.rendered += len(self.pending)
+        self.pending = []
+
+    def files(self):
+        return [f for u in self.units.values() for f in u["files"]]
+
+    def save(self):
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": self.version, "units": self.units}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+
+class BuildCache:
+    """The caches under ./.cache held in memory: parsed files, search terms,
+    lastmod dates, post cards and the previous build graph. A one-off build
+    loads them before create_site() and saves them after it; watch mode keeps
+    one instance across rebuilds and saves it on exit."""
+
+    def __init__(self, cache_path=PARSE_CACHE_PATH, incremental=False):
+        self.cache_path = cache_path
+        self.parse = load_parse_cache(cache_path) if cache_path else None
+        self.search = load_search_cache() if cache_path else {}
+        self.lastmod = load_lastmod() if cache_path else {}
+        self.fragments = load_fragments() if cache_path else {}
+        self.units = BuildGraph.load() if incremental else None
+        self.graph = None
+        self.post_ids = set()
+
+    def save(self):
+        if self.graph is not None:
+            self.graph.save()
+        if self.cache_path:
+            save_parse_cache(self.parse, self.cache_path)
+            save_search_cache(self.search)
+            save_lastmod(self.lastmod)
+            save_fragments(self.fragments, self.post_ids)
+
+
+def create_site(cache_path=PARSE_CACHE_PATH, incremental=False, index_path=None, jobs=1, json_feeds=False,
+                fingerprint=False, compress=False, search=False, archive=False, service_worker=False, profile=None, cache=None, sync=True):
+    # ./public is kept between builds: unchanged files are not rewritten and
+    # files the build no longer produces are removed by sync_public()
+    profile = profile or BuildProfile()
+    own_cache = cache is None
+    if own_cache:
+        cache = BuildCache(cache_path, incremental)
+    profile.phase("assets")
+    assets, static_files = create_assets(fingerprint, service_worker)
+    profile.count(len(static_files))
 
 
     with open('./ssg/aux/locales.json', 'r', encoding='utf-8') as f:
         locales = json.load(f)
 
-    authors = parse_dir(directory="./data/authors", extension=".md")
-    posts = parse_dir(directory="./data/posts", extension=".md")
+    index = None
+    if index_path:
+        profile.phase("index")
+        index, _ = build_index(index_path)
+        authors, posts = load_index(index)
+        profile.count(len(posts))
+    else:
+        profile.phase("parse authors")
+        authors = parse_dir(directory="./data/authors", extension=".md", cache=cache.parse)
+        profile.count(len(authors))
+        profile.phase("parse posts")
+        posts = parse_dir(directory="./data/posts", extension=".md", cache=cache.parse)
+        profile.count(len(posts))
     
-    [a.setdefault('posts', []) for a in authors.values()]
-
+    profile.phase("rate posts")
+    graph = BuildGraph(incremental=incremental, prev_units=cache.units)
+    with open(__file__, 'rb') as f:
+        graph.node("generator", hashlib.sha1(f.read()).hexdigest())
+    graph.node("locales", locales)
+    graph.node("assets", assets)
+    base = ["generator", "locales", "assets"]
+    graph.node("feed-mode", ["json" if json_feeds else "html", search, archive])
+
+    # nodes hash the parsed fields (with the post's rating for posts), so the
+    # hashes do not depend on the in-memory model
+    for k, fields in authors.items():
+        graph.node(f"author:{k}", fields)
+        authors[k] = Author(fields)
+
+    invalid = []
+    for k, fields in posts.items():
+        try:
+            p = Post(fields)
+        except ValueError as e:
+            # a bad or empty date, or a bad status value: the post is left
+            # out, like a file that does not parse
+            print(f"post {k}: {e}")
+            invalid.append(k)
+            continue
+        if p.author_id not in authors:
+            print(f"post {k}: unknown author {p.author_id}")
+            invalid.append(k)
+            continue
+        graph.node(f"post:{k}", {**fields, "params": p.params})
+        posts[k] = p
+        authors[p.author_id].posts.append(p)
+    for k in invalid:
+        del posts[k]
 
     # posts pages
+    profile.phase("post pages")
     for p in posts.values():
-        p["params"] = rate_post(p)
-        authors[str(p["author-id"])]["posts"].append(p)
-        [create_post_page(p,authors[p["author-id"]],rlang, locales) for rlang in LANGS]
+        deps = base + [f"post:{p.id}", f"author:{p.author_id}"]
+        for rlang in LANGS:
+            graph.build(f"post:{rlang}:{p.id}", deps, ("post", p.id, rlang))
 
     # authors pages
-    for a in authors.values():
-        a["stat"] = calc_stat(a["posts"])
-        rsfposts = {
-            "/":sorted(a["posts"], key=lambda x: (x['time-statement'] if x['time-statement'] else "9999-12-31", x['id']), reverse=True),
-            "awaiting":sorted([item for item in a["posts"] if item['status'] == 'awaiting'], key=lambda x: (x['time-awaiting'] if x['time-awaiting'] else '9999-12-31', x['id'])),
-            "verified":sorted([item for item in a["posts"] if item['status'] != 'awaiting'], key=lambda x: (x['time-verified'] if x['time-verified'] else "9999-12-31", x['id']), reverse=True),
-        }
-        [create_author_page(a,v,rlang,k,locales) for rlang in LANGS for k,v in rsfposts.items()]
+    profile.phase("author pages")
+    if index is not None:
+        index_feeds = {k: index_author_feeds(index, k) for k in INDEX_FEEDS}
+    author_stats, main_stat = calc_stats(list(authors.values()), posts.values())
+    author_feeds = {}
+    for a, stat in zip(authors.values(), author_stats):
+        a.stat = stat
+        a.heatmap = pack_heatmap(a.posts)
+        graph.node(f"stat:{a.id}", a.stat)
+        if index is None:
+            rsfposts = {
+                "/":sort_new(a.posts),
+                "awaiting":sort_awaiting(a.posts),
+                "verified":sort_verified(a.posts),
+            }
+        else:
+            rsfposts = {("/" if k == "new" else k): [posts[i] for i in v.get(a.id, [])] for k,v in index_feeds.items()}
+        # an author listing is paginated like the main feeds, so a changed
+        # post re-renders only the pages it is listed on (and the first page
+        # when the heatmap or stat changes)
+        graph.node(f"heatmap:{a.id}", a.heatmap)
+        author_feeds[a.id] = {k: paginate(v) or [[]] for k,v in rsfposts.items()}
+        for k,pages in author_feeds[a.id].items():
+            graph.node(f"feed:{a.id}:{k}", len(pages))
+            for i,page in enumerate(pages):
+                deps = base + [f"author:{a.id}"] + [f"post:{x.id}" for x in page]
+                if i == 0:
+                    deps = deps + [f"stat:{a.id}", f"heatmap:{a.id}", f"feed:{a.id}:{k}", "feed-mode"]
+                    for rlang in LANGS:
+                        graph.build(f"author:{rlang}:{a.id}:{k}", deps, ("author", a.id, k, 1, rlang))
+                elif json_feeds:
+                    graph.node(f"shard:{a.id}:{k}:{i+1}", [x.id for x in page])
+                    graph.build(f"shard:{a.id}:{k}:{i+1}", ["generator", f"shard:{a.id}:{k}:{i+1}"], ("author-shard", a.id, k, i+1))
+                else:
+                    for rlang in LANGS:
+                        graph.build(f"author:{rlang}:{a.id}:{k}:{i+1}", deps, ("author", a.id, k, i+1, rlang))
 
     # mainfeed pages
-    main_stat = calc_stat(posts.values())
+    profile.phase("main feeds")
     main_ranking = calc_ranking(authors.values())
     posts_ranking = calc_ranking_posts(authors.values())
+    graph.node("stat", main_stat)
 
-    rsfposts = {
-        "new":sorted(posts.values(), key=lambda x: (x['time-statement'] if x['time-statement'] else "9999-12-31", x['id']), reverse=True),
-        "awaiting":sorted([item for item in posts.values() if item['status'] == 'awaiting'], key=lambda x: (x['time-awaiting'] if x['time-awaiting'] else '9999-12-31', x['id'])),
-        "verified":sorted([item for item in posts.values() if item['status'] != 'awaiting'], key=lambda x: (x['time-verified'] if x['time-verified'] else "9999-12-31", x['id']), reverse=True),
-    }
-    [create_mainfeed_page(authors,v, main_stat, rlang,k,locales) for rlang in LANGS for k,v in rsfposts.items()]
+    if index is None:
+        rsfposts = {
+            "new":sort_new(posts.values()),
+            "awaiting":sort_awaiting(posts.values()),
+            "verified":sort_verified(posts.values()),
+        }
+    else:
+        rsfposts = {k: [posts[i] for i in index_feed(index, k)] for k in INDEX_FEEDS}
+    feeds = {}
+    feed_names = {}
+    for k,v in rsfposts.items():
+        if archive:
+            feeds[k], feed_names[k] = paginate_months(v, ARCHIVE_KEYS[k])
+        else:
+            feeds[k] = paginate(v)
+            feed_names[k] = list(range(1, len(feeds[k]) + 1))
+    for k,pages in feeds.items():
+        # archive months do not depend on the list of months, only the
+        # first page (which links them) does
+        graph.node(f"feed:{k}", feed_names[k] if archive else len(pages))
+        for i,(page,name) in enumerate(zip(pages, feed_names[k])):
+            deps = base + ([] if archive and i > 0 else [f"feed:{k}"]) + [d for x in page for d in (f"post:{x.id}", f"author:{x.author_id}")]
+            if i == 0:
+                for rlang in LANGS:
+                    graph.build(f"feed:{rlang}:{k}:1", deps + ["stat", "feed-mode"], ("feed", k, 1, rlang))
+            elif json_feeds:
+                # shards only list post ids and are shared by both languages
+                graph.node(f"shard:{k}:{name}", [x.id for x in page])
+                graph.build(f"shard:{k}:{name}", ["generator", f"shard:{k}:{name}"], ("shard", k, i+1))
+            else:
+                for rlang in LANGS:
+                    graph.build(f"feed:{rlang}:{k}:{name}", deps, ("feed", k, i+1, rlang))
+
+    # per-language post store for feeds and search results rendered client-side
+    buckets = {}
+    if json_feeds or search:
+        profile.phase("post stores")
+        for p in posts.values():
+            buckets.setdefault(thousand_bucket(int(p.id)), []).append(p)
+        for b,ps in buckets.items():
+            deps = base + [d for x in ps for d in (f"post:{x.id}", f"author:{x.author_id}")]
+            for rlang in LANGS:
+                graph.build(f"store:{rlang}:{b}", deps, ("store", b, rlang))
+
+    # search index shards and page
+    search_shards = {}
+    if search:
+        profile.phase("search index")
+        search_shards = build_search_index(posts, {k: graph.nodes[f"post:{k}"] for k in posts}, cache.search)
+        for name, shard in search_shards.items():
+            graph.node(f"search:{name}", shard)
+            graph.build(f"search:{name}", ["generator", f"search:{name}"], ("search", name))
+        for rlang in LANGS:
+            graph.build(f"search:{rlang}", base, ("search-page", rlang))
 
     # ranking index page
+    profile.phase("ranking")
     rsfs = ["/"]
-    [create_ranking_page(main_stat, main_ranking, rlang, rsf, locales) for rlang in LANGS for rsf in rsfs]
+    graph.node("ranking", [x.id for x in main_ranking])
+    deps = base + ["stat", "ranking"] + [d for x in main_ranking for d in (f"author:{x.id}", f"stat:{x.id}")]
+    for rlang in LANGS:
+        for rsf in rsfs:
+            graph.build(f"ranking:{rlang}:{rsf}", deps, ("ranking", rlang, rsf))
 
     # authors list
-    [create_authors_page(main_stat, posts_ranking, rlang, locales) for rlang in LANGS]
+    profile.phase("authors page")
+    graph.node("authors", [x.id for x in posts_ranking])
+    deps = base + ["stat", "authors"] + [d for x in posts_ranking for d in (f"author:{x.id}", f"stat:{x.id}")]
+    for rlang in LANGS:
+        graph.build(f"authors:{rlang}", deps, ("authors", rlang))
 
     # about page
-    [create_about_page(rlang, locales) for rlang in LANGS]
+    profile.phase("about")
+    for rlang in LANGS:
+        with open(f'./ssg/aux/about/about.{rlang}.html', 'r', encoding='utf-8') as file:
+            graph.node(f"about:{rlang}", file.read())
+        graph.build(f"about:{rlang}", base + [f"about:{rlang}"], ("about", rlang))
 
     # sitemap
-    create_sitemap(authors.values())
+    profile.phase("sitemap")
+    names = [f"author:{a}" for a in authors] + [f"post:{p}" for p in posts] + [f"about:{rlang}" for rlang in LANGS]
+    sitemaps = sitemap_shards(authors.values(), posts.values(), track_lastmod(graph.nodes, names, cache.lastmod))
+    for name, entries in sitemaps.items():
+        graph.node(name, entries)
+        graph.build(name, ["generator", name], ("sitemap", name))
+    graph.node("sitemap", [(k, max(d for _, d in v)) for k, v in sitemaps.items()])
+    graph.build("sitemap", ["generator", "sitemap"], ("sitemap-index",))
+
+    state = {
+        "locales": locales,
+        "authors": authors,
+        "posts": posts,
+        "author_feeds": author_feeds,
+        "feeds": feeds,
+        "feed_names": feed_names,
+        "main_stat": main_stat,
+        "main_ranking": main_ranking,
+        "posts_ranking": posts_ranking,
+        "json_feeds": json_feeds,
+        "assets": assets,
+        "buckets": buckets,
+        "search": search,
+        "search_shards": search_shards,
+        "sitemaps": sitemaps,
+        "fragments": cache.fragments,
+        "item_hashes": {p.id: node_hash([graph.nodes[d] for d in base + [f"post:{p.id}", f"author:{p.author_id}"]]) for p in posts.values()},
+    }
+    profile.phase("post cards")
+    fill_fragments(state, [task for _, _, _, task in graph.pending])
+    profile.phase("render")
+    profile.count(len(graph.pending))
+    graph.render(state, jobs, profile if profile.enabled else None)
+    profile.phase("save caches")
+    cache.units = graph.units
+    cache.graph = graph
+    cache.post_ids = set(posts)
+    if own_cache:
+        cache.save()
+    if index is not None:
+        index.close()
+    if incremental and sync:
+        print(f"incremental build: {graph.rendered} rendered, {graph.skipped} unchanged")
+
+    if sync:
+        outputs = static_files + graph.files()
+        if compress:
+            profile.phase("precompress")
+            outputs += precompress(outputs)
+        profile.phase("sync public")
+        delta = sync_public(outputs)
+        print(f"deploy delta: {len(delta['added'])} added, {len(delta['changed'])} changed, {len(delta['removed'])} removed")
+    profile.end()
+    return graph
+
+
+# --stream: a build whose memory use does not grow with the archive. The data
+# goes through the sqlite index, and pages are rendered from rows read back in
+# feed order a page at a time; what stays in memory is the authors with their
+# stats and the per-author counts those come from. The output paths, lastmod
+# dates and the output manifest are kept in the index database as well. There
+# is no build graph: every page is rendered, and write_output() leaves the
+# unchanged ones alone.
+STREAM_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lastmod (name TEXT PRIMARY KEY, hash TEXT NOT NULL, date TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS manifest (path TEXT PRIMARY KEY, hash TEXT NOT NULL, size INTEGER NOT NULL, mtime INTEGER NOT NULL, seen INTEGER NOT NULL DEFAULT 0);
+CREATE TEMP TABLE IF NOT EXISTS outputs (path TEXT PRIMARY KEY);
+CREATE TEMP TABLE IF NOT EXISTS delta (kind TEXT NOT NULL, path TEXT NOT NULL);
+CREATE TEMP TABLE IF NOT EXISTS sources (name TEXT PRIMARY KEY, hash TEXT NOT NULL);
+"""
+STREAM_POSTS_BATCH = 1000
+STREAM_AUTHORS_BATCH = 100
+
+STREAM_DB = {}
+
+def stream_db():
+    # one read connection per process; a forked worker opens its own
+    pid = os.getpid()
+    if pid not in STREAM_DB:
+        STREAM_DB.clear()
+        STREAM_DB[pid] = sqlite3.connect(RENDER_STATE["index_path"])
+    return STREAM_DB[pid]
+
+
+def stream_posts(conn, where="1", order="num", args=()):
+    for (data,) in conn.execute(f"SELECT fields FROM posts WHERE ({where}) AND {KNOWN_AUTHOR} ORDER BY {order}", args):
+        yield Post(json.loads(data))
+
+
+def stream_pages(conn, where, order, args=(), nb=100):
+    """(number of pages, the pages) of a listing, as paginate() would split it;
+    the pages are read as they are consumed."""
+    (n,) = conn.execute(f"SELECT COUNT(*) FROM posts WHERE ({where}) AND {KNOWN_AUTHOR}", args).fetchone()
+    def pages():
+        page = []
+        for p in stream_posts(conn, where, order, args):
+            page.append(p)
+            if len(page) == nb:
+                yield page
+                page = []
+        if page:
+            yield page
+    return -(-n // nb), pages()
+
+
+def render_stream_task(task):
+    s = RENDER_STATE
+    conn = stream_db()
+    locales = s["locales"]
+    kind = task[0]
+    files = []
+    if kind == "posts":
+        _, lo, hi = task
+        for p in stream_posts(conn, "num >= ? AND num < ?", "num", (lo, hi)):
+            for rlang in LANGS:
+                files += create_post_page(p, s["authors"][p.author_id], rlang, locales)
+    elif kind == "authors":
+        for aid in task[1]:
+            a = s["authors"][aid]
+            rows = conn.execute("SELECT id, status FROM posts WHERE author_id = ? ORDER BY COALESCE(NULLIF(time_statement, ''), '9999-12-31'), id", (aid,))
+            a.heatmap = encode_heatmap([(int(pid), STATUSES.index(status)) for pid, status in rows])
+            for feed, (where, order) in INDEX_FEEDS.items():
+                rsf = "/" if feed == "new" else feed
+                npages, pages = stream_pages(conn, f"{where} AND author_id = ?", order, (aid,))
+                if npages == 0:
+                    npages, pages = 1, [[]]
+                for i, page in enumerate(pages, 1):
+                    for rlang in LANGS:
+                        if i == 1:
+                            files += create_author_page(a, page, npages, rlang, rsf, locales)
+                        else:
+                            files += create_author_fragment(a, page, i, rlang, rsf, locales)
+            a.heatmap = None
+    elif kind == "feed":
+        _, feed = task
+        where, order = INDEX_FEEDS[feed]
+        npages, pages = stream_pages(conn, where, order)
+        names = list(range(1, npages + 1))
+        for i, page in enumerate(pages, 1):
+            for rlang in LANGS:
+                if i == 1:
+                    files += create_mainfeed_page(s["authors"], page, names, s["main_stat"], rlang, feed, locales)
+                else:
+                    files += create_mainfeed_fragment(s["authors"], page, i, rlang, feed, locales)
+    elif kind == "pages":
+        for rlang in LANGS:
+            files += create_ranking_page(s["main_stat"], s["main_ranking"], rlang, "/", locales)
+            files += create_authors_page(s["main_stat"], s["posts_ranking"], rlang, locales)
+            files += create_about_page(rlang, locales)
+    else:
+        raise ValueError(f"unknown render task {task!r}")
+    return files
+
+
+def run_stream_task(task):
+    # -> (task kind, files, seconds, files written, bytes written)
+    files0, bytes0 = WRITE_STATS["files"], WRITE_STATS["bytes"]
+    start = time.perf_counter()
+    files = render_stream_task(task)
+    return task[0], files, time.perf_counter() - start, WRITE_STATS["files"] - files0, WRITE_STATS["bytes"] - bytes0
+
+
+def stream_lastmod(conn):
+    """track_lastmod() kept in the lastmod table; the hash of a post or an
+    author is the hash of its source file."""
+    today = datetime.now(timezone.utc).date().isoformat()
+    with conn:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'lastmod-version'").fetchone()
+        if row is None or row[0] != str(LASTMOD_VERSION):
+            conn.execute("DELETE FROM lastmod")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('lastmod-version', ?)", (str(LASTMOD_VERSION),))
+        conn.execute("DELETE FROM sources")
+        conn.execute("INSERT INTO sources (name, hash) SELECT substr(kind, 1, length(kind) - 1) || ':' || id, hash FROM files")
+        conn.executemany("INSERT OR REPLACE INTO sources (name, hash) VALUES (?, ?)",
+                         [(f"about:{rlang}", file_hash(f"./{source_path(f'about:{rlang}')}")) for rlang in LANGS])
+        conn.execute("DELETE FROM lastmod WHERE name NOT IN (SELECT name FROM sources)")
+        conn.execute("INSERT OR REPLACE INTO lastmod (name, hash, date) SELECT s.name, s.hash, ? FROM sources s JOIN lastmod l ON l.name = s.name WHERE s.hash != l.hash", (today,))
+        # what is left in sources is seen for the first time
+        conn.execute("DELETE FROM sources WHERE name IN (SELECT name FROM lastmod)")
+        seed = git_lastmod() if conn.execute("SELECT 1 FROM sources LIMIT 1").fetchone() else {}
+        conn.executemany("INSERT INTO lastmod (name, hash, date) VALUES (?, ?, ?)",
+                         ((name, h, first_lastmod(name, seed, today)) for name, h in conn.execute("SELECT name, hash FROM sources")))
+
+
+def stream_sitemap(conn):
+    """The sitemap_shards() shards written one at a time from the lastmod table."""
+    files = []
+    shards = []
+    def write(name, entries):
+        entries = list(entries)
+        files.extend(create_sitemap_shard(name, entries))
+        shards.append((name, max(d for _, d in entries)))
+
+    (site,) = conn.execute("SELECT COALESCE(MAX(date), '') FROM lastmod").fetchone()
+    (about,) = conn.execute("SELECT COALESCE(MAX(date), '') FROM lastmod WHERE name LIKE 'about:%'").fetchone()
+    write("sitemap-pages", sitemap_pages(site, about))
+    rows = conn.execute("""
+        SELECT a.id, MAX(la.date, COALESCE((SELECT MAX(lp.date) FROM posts p JOIN lastmod lp ON lp.name = 'post:' || p.id WHERE p.author_id = a.id), ''))
+        FROM authors a JOIN lastmod la ON la.name = 'author:' || a.id ORDER BY a.num""")
+    for bucket, group in groupby(rows, key=lambda x: thousand_bucket(int(x[0]))):
+        write(f"sitemap-authors-{bucket}", ((path, d) for aid, d in group for path in (f"/{aid}", f"/{aid}/awaiting", f"/{aid}/verified")))
+    rows = conn.execute("""
+        SELECT p.id, p.author_id, MAX(lp.date, la.date) FROM posts p
+        JOIN lastmod lp ON lp.name = 'post:' || p.id JOIN lastmod la ON la.name = 'author:' || p.author_id ORDER BY p.num""")
+    for bucket, group in groupby(rows, key=lambda x: thousand_bucket(int(x[0]))):
+        write(f"sitemap-posts-{bucket}", ((f"/{aid}/{pid}", d) for pid, aid, d in group))
+    files += create_sitemap(sorted(shards, key=lambda x: natural_key(x[0])))
+    return files
+
+
+def sync_public_stream(conn, public_path='./public', manifest_path=MANIFEST_PATH, delta_path=DELTA_PATH):
+    """sync_public() against the outputs and manifest tables; the manifest and
+    delta files are written row by row. Returns the number of added, changed
+    and removed files."""
+    conn.execute("DELETE FROM delta")
+    conn.execute("UPDATE manifest SET seen = 0")
+    for root, dirs, names in os.walk(public_path, topdown=False):
+        for name in names:
+            path = os.path.join(root, name)
+            if conn.execute("SELECT 1 FROM outputs WHERE path = ?", (os.path.normpath(path),)).fetchone() is None:
+                os.remove(path)
+                continue
+            key = Path(os.path.relpath(path, public_path)).as_posix()
+            st = os.stat(path)
+            entry = conn.execute("SELECT hash, size, mtime FROM manifest WHERE path = ?", (key,)).fetchone()
+            if entry is None:
+                conn.execute("INSERT INTO manifest (path, hash, size, mtime, seen) VALUES (?, ?, ?, ?, 1)", (key, file_hash(path), st.st_size, st.st_mtime_ns))
+                conn.execute("INSERT INTO delta (kind, path) VALUES ('added', ?)", (key,))
+            elif entry[1] != st.st_size or entry[2] != st.st_mtime_ns:
+                digest = file_hash(path)
+                conn.execute("UPDATE manifest SET hash = ?, size = ?, mtime = ?, seen = 1 WHERE path = ?", (digest, st.st_size, st.st_mtime_ns, key))
+                if digest != entry[0]:
+                    conn.execute("INSERT INTO delta (kind, path) VALUES ('changed', ?)", (key,))
+            else:
+                conn.execute("UPDATE manifest SET seen = 1 WHERE path = ?", (key,))
+        if os.path.normpath(root) != os.path.normpath(public_path) and not os.listdir(root):
+            os.rmdir(root)
+    conn.execute("INSERT INTO delta (kind, path) SELECT 'removed', path FROM manifest WHERE seen = 0")
+    conn.execute("DELETE FROM manifest WHERE seen = 0")
+    conn.commit()
+
+    # the same JSON that sync_public() dumps
+    Path(manifest_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{manifest_path}.tmp", 'w', encoding='utf-8') as f:
+        f.write('{"files": {')
+        for i, (key, h, size, mtime) in enumerate(conn.execute("SELECT path, hash, size, mtime FROM manifest ORDER BY path")):
+            f.write(f'{", " if i else ""}{json.dumps(key, ensure_ascii=False)}: {json.dumps({"hash": h, "mtime": mtime, "size": size})}')
+        f.write('}}')
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    counts = {}
+    Path(delta_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{delta_path}.tmp", 'w', encoding='utf-8') as f:
+        f.write('{')
+        for i, kind in enumerate(["added", "changed", "removed"]):
+            f.write(f'{"," if i else ""}\n "{kind}": [')
+            n = 0
+            for (key,) in conn.execute("SELECT path FROM delta WHERE kind = ? ORDER BY path", (kind,)):
+                f.write(f'{"," if n else ""}\n  {json.dumps(key, ensure_ascii=False)}')
+                n += 1
+            f.write('\n ]' if n else ']')
+            counts[kind] = n
+        f.write('\n}')
+    os.replace(f"{delta_path}.tmp", delta_path)
+    return counts
+
+
+def create_site_stream(index_path=INDEX_PATH, jobs=1, fingerprint=False, service_worker=False, profile=None):
+    profile = profile or BuildProfile()
+    profile.phase("assets")
+    assets, static_files = create_assets(fingerprint, service_worker)
+    profile.count(len(static_files))
 
-create_site()
+    with open('./ssg/aux/locales.json', 'r', encoding='utf-8') as f:
+        locales = json.load(f)
 
+    profile.phase("index")
+    conn, _ = build_index(index_path)
+    conn.executescript(STREAM_SCHEMA)
+    conn.execute("DELETE FROM outputs")
+    authors = {}
+    for (data,) in conn.execute("SELECT fields FROM authors ORDER BY num"):
+        a = Author(json.loads(data))
+        authors[a.id] = a
+    for pid, aid in conn.execute(f"SELECT id, author_id FROM posts WHERE NOT {KNOWN_AUTHOR} ORDER BY num"):
+        print(f"post {pid}: unknown author {aid}")
+    profile.count(conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0])
+
+    profile.phase("stats")
+    codes = {aid: i for i, aid in enumerate(authors)}
+    combos = {x: i for i, x in enumerate(COMBOS)}
+    counts = [[0] * len(COMBOS) for _ in authors]
+    for aid, status, complexity, confidence, n in conn.execute(
+            f"SELECT author_id, status, complexity, confidence, COUNT(*) FROM posts WHERE {KNOWN_AUTHOR} GROUP BY author_id, status, complexity, confidence"):
+        counts[codes[aid]][combos[status, complexity, confidence]] += n
+    author_stats, main_stat = stats_from_counts(counts)
+    del counts
+    for a, stat in zip(authors.values(), author_stats):
+        a.stat = stat
+
+    profile.phase("render")
+    state = {
+        "locales": locales,
+        "authors": authors,
+        "main_stat": main_stat,
+        "main_ranking": calc_ranking(authors.values()),
+        "posts_ranking": calc_ranking_posts(authors.values()),
+        "assets": assets,
+        "index_path": index_path,
+    }
+    # the main feeds go first: each is one task over every post
+    tasks = [("feed", k) for k in INDEX_FEEDS] + [("pages",)]
+    ids = list(authors)
+    tasks += [("authors", tuple(ids[i:i + STREAM_AUTHORS_BATCH])) for i in range(0, len(ids), STREAM_AUTHORS_BATCH)]
+    lo, hi = conn.execute("SELECT MIN(num), MAX(num) FROM posts").fetchone()
+    if lo is not None:
+        tasks += [("posts", n, n + STREAM_POSTS_BATCH) for n in range(lo, hi + 1, STREAM_POSTS_BATCH)]
+    profile.count(len(tasks))
+
+    def outputs(files):
+        conn.executemany("INSERT OR IGNORE INTO outputs (path) VALUES (?)", [(os.path.normpath(f),) for f in files])
+
+    def record(kind, files, seconds, nfiles, nbytes):
+        outputs(files)
+        if jobs > 1:
+            # count what the workers wrote as written by this build
+            WRITE_STATS["files"] += nfiles
+            WRITE_STATS["bytes"] += nbytes
+        if profile.enabled:
+            profile.task(kind, seconds, nfiles, nbytes)
+
+    outputs(static_files)
+    conn.commit()
+    set_render_state(state)
+    if jobs > 1:
+        ctx = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx, initializer=set_render_state, initargs=(state,)) as ex:
+            # results are recorded as they arrive, not held until the end
+            for future in as_completed([ex.submit(run_stream_task, task) for task in tasks]):
+                record(*future.result())
+    else:
+        for task in tasks:
+            record(*run_stream_task(task))
+
+    profile.phase("sitemap")
+    stream_lastmod(conn)
+    outputs(stream_sitemap(conn))
+
+    profile.phase("sync public")
+    delta = sync_public_stream(conn)
+    conn.close()
+    print(f"deploy delta: {delta['added']} added, {delta['changed']} changed, {delta['removed']} removed")
+    profile.end()
 
-#
 
+# watch mode: the caches stay in memory between rebuilds, and a rebuild
+# re-parses only files whose size or mtime changed and renders only units
+# whose inputs changed; ./public is served by a local HTTP server
+WATCH_DIRS = ["./data", "./ssg/aux"]
 
 
+def watch_snapshot(dirs=WATCH_DIRS):
+    snap = {}
+    for directory in dirs:
+        for root, _, names in os.walk(directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                snap[path] = (st.st_size, st.st_mtime_ns)
+    return snap
+
+
+def serve_public(host, port, directory="./public"):
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def watch(build_args, host="127.0.0.1", port=8000, interval=0.3):
+    cache = BuildCache(build_args["cache_path"], incremental=True)
+    create_site(**build_args, incremental=True, cache=cache)
+    server = serve_public(host, port)
+    print(f"serving ./public at http://{host}:{server.server_address[1]}/, watching {' and '.join(WATCH_DIRS)} (Ctrl+C to stop)")
+    snap = watch_snapshot()
+    try:
+        while True:
+            time.sleep(interval)
+            current = watch_snapshot()
+            if current == snap:
+                continue
+            changed = sorted(k for k in current.keys() | snap.keys() if current.get(k) != snap.get(k))
+            snap = current
+            prev_units = cache.units
+            start = time.perf_counter()
+            try:
+                graph = create_site(**dict(build_args, jobs=1), incremental=True, cache=cache, sync=False)
+            except Exception as e:
+                print(f"build failed: {e!r}")
+                continue
+            # outputs of units the build no longer has (a deleted post)
+            removed = [f for u, x in prev_units.items() if u not in graph.units for f in x["files"]]
+            for f in removed:
+                if os.path.exists(f):
+                    os.remove(f)
+            names = ", ".join(changed[:3]) + (f" and {len(changed) - 3} more" if len(changed) > 3 else "")
+            print(f"{names}: {graph.rendered} rendered, {len(removed)} removed in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        cache.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the static site into ./public")
+    parser.add_argument("--incremental", action="store_true", help="re-render only outputs whose inputs changed")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the on-disk parse and post-card caches")
+    parser.add_argument("--index", action="store_true", help=f"read data from the sqlite index ({INDEX_PATH}), updating it first")
+    parser.add_argument("--build-index", action="store_true", help="only build or update the sqlite index, then exit")
+    parser.add_argument("--stream", action="store_true",
+                        help="bounded-memory build for very large archives: read data through the sqlite index and render listings a page at a time")
+    parser.add_argument("--json-feeds", action="store_true", help="serve feed pages after the first as JSON id shards rendered client-side")
+    parser.add_argument("--archive-feeds", action="store_true", help="split feeds after the first page by month instead of into 100-post pages")
+    parser.add_argument("--search", action="store_true", help="build the sharded full-text search index and the search page")
+    parser.add_argument("--fingerprint", action="store_true", help="reference assets and icons by content-hashed URLs")
+    parser.add_argument("--service-worker", action="store_true", help="write /sw.js, which precaches assets by content hash and caches pages offline")
+    parser.add_argument("--precompress", action="store_true", help="write .gz (and .br with the brotli module) next to text outputs")
+    parser.add_argument("--profile", action="store_true", default=os.environ.get("SSG_PROFILE", "") not in ("", "0"),
+                        help=f"time each build phase, print a summary and write it to {PROFILE_PATH} (or set SSG_PROFILE=1)")
+    parser.add_argument("--profile-top", type=int, default=0, metavar="N",
+                        help="with --profile, also run cProfile in the main process and report the N functions with the most own time")
+    parser.add_argument("--watch", action="store_true", help="build, then rebuild on changes under data/ and ssg/aux/ while serving ./public")
+    parser.add_argument("--port", type=int, default=8000, help="preview server port for --watch (default: 8000)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="worker processes for rendering (default: CPU count)")
+    args = parser.parse_args()
+    if args.build_index:
+        conn, changed = build_index(INDEX_PATH)
+        conn.close()
+        print(f"index {INDEX_PATH}: {changed} file(s) updated")
+        return
+    if args.stream:
+        unsupported = [flag for flag, on in [("--json-feeds", args.json_feeds), ("--archive-feeds", args.archive_feeds), ("--search", args.search),
+                                             ("--precompress", args.precompress), ("--watch", args.watch)] if on]
+        if unsupported:
+            parser.error(f"--stream does not support {', '.join(unsupported)}")
+        profile = BuildProfile(enabled=args.profile or args.profile_top > 0, top=args.profile_top)
+        create_site_stream(INDEX_PATH, jobs=args.jobs, fingerprint=args.fingerprint, service_worker=args.service_worker, profile=profile)
+        if profile.enabled:
+            profile.report()
+        return
+    build_args = dict(cache_path=None if args.no_cache else PARSE_CACHE_PATH,
+                      index_path=INDEX_PATH if args.index else None, jobs=args.jobs,
+                      json_feeds=args.json_feeds, fingerprint=args.fingerprint, compress=args.precompress,
+                      search=args.search, archive=args.archive_feeds, service_worker=args.service_worker)
+    if args.watch:
+        watch(build_args, port=args.port)
+        return
+    profile = BuildProfile(enabled=args.profile or args.profile_top > 0, top=args.profile_top)
+    create_site(**build_args, incremental=args.incremental, profile=profile)
+    if profile.enabled:
+        profile.report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark ssg/generator.py on synthetic datasets.
+
+Each dataset is generated once with tools/synth_data.py and kept under
+--work. The build runs in a scratch directory next to it that links to this
+checkout's ssg/, so the repository's own public/ and .cache/ are not touched.
+Every dataset is built twice: "cold" from an empty public/ and .cache/, then
+"warm" with --incremental and nothing changed. The harness records wall time,
+peak RSS, files written and bytes written for each run, and appends the
+results together with the git revision to <work>/results.jsonl.
+
+Usage:
+    python tools/bench.py --posts 10000,100000
+    python tools/bench.py --posts 10000 --build-args="--json-feeds --search"
+    python tools/bench.py --compare
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+DEFAULT_WORK = os.path.join(ROOT, ".cache", "bench")
+
+
+def git_revision() -> str:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return rev + ("+dirty" if dirty else "")
+
+
+def ensure_dataset(work: str, posts: int, authors: int, seed: int) -> str:
+    name = f"data-{posts}-{authors}-{seed}"
+    path = os.path.join(work, name)
+    if not os.path.exists(os.path.join(path, ".done")):
+        shutil.rmtree(path, ignore_errors=True)
+        print(f"generating {name} ...", flush=True)
+        subprocess.run([sys.executable, os.path.join(ROOT, "tools", "synth_data.py"), "--out", path,
+                        "--posts", str(posts), "--authors", str(authors), "--seed", str(seed)], check=True)
+        open(os.path.join(path, ".done"), "w").close()
+    return path
+
+
+def prepare_site(work: str, data: str) -> str:
+    site = os.path.join(work, "site")
+    shutil.rmtree(site, ignore_errors=True)
+    os.makedirs(site)
+    os.symlink(os.path.join(ROOT, "ssg"), os.path.join(site, "ssg"))
+    os.symlink(data, os.path.join(site, "data"))
+    return site
+
+
+def run_build(site: str, args: list) -> dict:
+    cmd = [sys.executable, os.path.join("ssg", "generator.py")] + args
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=site, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise SystemExit(f"build failed: {' '.join(cmd)}")
+    # a child's ru_maxrss starts at the RSS of the process that started it,
+    # so the manifest is read in a fresh process to keep this one small
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as ex:
+        outputs = ex.submit(summarize_outputs, site).result()
+    return {
+        "wall_s": round(wall, 3),
+        # ru_maxrss is in kilobytes on Linux; for -j > 1 it is the largest
+        # single process, workers included
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        **outputs,
+    }
+
+
+def summarize_outputs(site: str) -> dict:
+    # sync_public() records what the build wrote in the deploy delta
+    with open(os.path.join(site, ".cache", "deploy-delta.json"), encoding="utf-8") as f:
+        delta = json.load(f)
+    with open(os.path.join(site, ".cache", "manifest.json"), encoding="utf-8") as f:
+        files = json.load(f)["files"]
+    written = delta["added"] + delta["changed"]
+    return {
+        "files_written": len(written),
+        "bytes_written": sum(files[k]["size"] for k in written),
+        "files_total": len(files),
+        "bytes_total": sum(x["size"] for x in files.values()),
+    }
+
+
+def bench(args):
+    os.makedirs(args.work, exist_ok=True)
+    rev = git_revision()
+    build_args = args.build_args.split()
+    results_path = os.path.join(args.work, "results.jsonl")
+    for posts in [int(x) for x in args.posts.split(",")]:
+        authors = args.authors or max(1, posts // 7)
+        data = ensure_dataset(args.work, posts, authors, args.seed)
+        site = prepare_site(args.work, data)
+        for mode, extra in [("cold", []), ("warm", ["--incremental"])]:
+            for _ in range(args.rounds):
+                if mode == "cold":
+                    shutil.rmtree(os.path.join(site, "public"), ignore_errors=True)
+                    shutil.rmtree(os.path.join(site, ".cache"), ignore_errors=True)
+                result = run_build(site, build_args + extra)
+                record = {
+                    "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "rev": rev,
+                    "posts": posts,
+                    "authors": authors,
+                    "seed": args.seed,
+                    "build_args": " ".join(build_args),
+                    "mode": mode,
+                    **result,
+                }
+                with open(results_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+                print_row(record)
+        shutil.rmtree(site, ignore_errors=True)
+
+
+HEADER = f"{'rev':<14} {'posts':>8} {'mode':<5} {'args':<20} {'wall s':>8} {'rss MB':>8} {'written':>8} {'MB written':>10}"
+
+
+def print_row(r: dict):
+    if not getattr(print_row, "header", False):
+        print(HEADER)
+        print_row.header = True
+    print(f"{r['rev']:<14} {r['posts']:>8} {r['mode']:<5} {r['build_args'][:20]:<20} {r['wall_s']:>8.2f} "
+          f"{r['peak_rss_mb']:>8.1f} {r['files_written']:>8} {r['bytes_written'] / 1e6:>10.1f}")
+
+
+def compare(args):
+    # best run per (revision, dataset, args, mode); rows for the same dataset,
+    # args and mode are together, revisions in the order they were first benchmarked
+    results_path = os.path.join(args.work, "results.jsonl")
+    try:
+        with open(results_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        raise SystemExit(f"no results in {results_path}")
+    best = {}
+    first = {}
+    for r in records:
+        first.setdefault(r["rev"], len(first))
+        key = (r["rev"], r["posts"], r["build_args"], r["mode"])
+        if key not in best or r["wall_s"] < best[key]["wall_s"]:
+            best[key] = r
+    for r in sorted(best.values(), key=lambda r: (r["posts"], r["build_args"], r["mode"], first[r["rev"]])):
+        print_row(r)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", default="10000", help="comma-separated dataset sizes (default: 10000)")
+    parser.add_argument("--authors", type=int, default=None, help="authors per dataset (default: posts / 7)")
+    parser.add_argument("--seed", type=int, default=1, help="dataset seed (default: 1)")
+    parser.add_argument("--rounds", type=int, default=1, help="runs per mode (default: 1)")
+    parser.add_argument("--build-args", default="-j1", help="arguments passed to the generator (default: -j1)")
+    parser.add_argument("--work", default=DEFAULT_WORK, help=f"datasets and results directory (default: {DEFAULT_WORK})")
+    parser.add_argument("--compare", action="store_true", help="print the best recorded run per revision and exit")
+    args = parser.parse_args()
+    if args.compare:
+        compare(args)
+    else:
+        bench(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Check that the sqlite index in ssg/generator.py follows changes to the data
+tree: a copy of data/ is indexed, edited (a post moved to another bucket, a
+post removed, a post added, a post broken and then restored byte for byte) and
+indexed again, and after each step the index must hold exactly the posts and
+authors a fresh parse of the copy finds.
+
+Usage:
+    python tools/index_check.py
+    python tools/index_check.py --data data
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ssg"))
+
+from generator import build_index, parse_dir  # noqa: E402
+
+
+def compare(data_dir: str, index_path: str, step: str) -> bool:
+    conn, _ = build_index(index_path, data_dir)
+    try:
+        indexed = {kind: {row[0] for row in conn.execute(f"SELECT id FROM {kind}")} for kind in ("authors", "posts")}
+    finally:
+        conn.close()
+    ok = True
+    for kind in ("authors", "posts"):
+        parsed = set(parse_dir(os.path.join(data_dir, kind), ".md"))
+        missing = sorted(parsed - indexed[kind], key=int)
+        extra = sorted(indexed[kind] - parsed, key=int)
+        if missing or extra:
+            ok = False
+            print(f"{step}: {kind} missing from the index {missing[:10]}, not in the data {extra[:10]}")
+    print(f"{step}: {'ok' if ok else 'MISMATCH'} ({len(indexed['posts'])} posts, {len(indexed['authors'])} authors)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data", help="data directory to copy (default: data)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        index_path = os.path.join(tmp, "data.sqlite")
+        shutil.copytree(args.data, data_dir)
+        posts_dir = os.path.join(data_dir, "posts")
+        buckets = sorted((b for b in os.listdir(posts_dir) if b.isdigit()), key=int)
+        first = os.path.join(posts_dir, buckets[0])
+        names = sorted(os.listdir(first), key=lambda x: int(x.split(".")[0]))
+
+        ok = compare(data_dir, index_path, "initial")
+
+        # the same id under another bucket directory
+        moved = os.path.join(posts_dir, "moved", names[0])
+        os.makedirs(os.path.dirname(moved))
+        shutil.move(os.path.join(first, names[0]), moved)
+        ok &= compare(data_dir, index_path, f"moved {names[0]}")
+
+        os.remove(os.path.join(first, names[1]))
+        ok &= compare(data_dir, index_path, f"removed {names[1]}")
+
+        shutil.copy(moved, os.path.join(first, names[1]))
+        ok &= compare(data_dir, index_path, f"added {names[1]}")
+
+        # a post that fails to index and is then put back as it was
+        broken = os.path.join(first, names[2])
+        with open(broken, "rb") as f:
+            original = f.read()
+        with open(broken, "wb") as f:
+            f.write(original.replace(b"### status", b"### status\n\nbroken\n\n### was status", 1))
+        conn, _ = build_index(index_path, data_dir)
+        conn.close()
+        with open(broken, "wb") as f:
+            f.write(original)
+        ok &= compare(data_dir, index_path, f"restored {names[2]}")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Check the single-pass front-matter parser in ssg/generator.py against the
+previous regex implementation over the whole data/ tree, and time both.
+
+Usage:
+    python tools/parse_check.py
+    python tools/parse_check.py --data data --rounds 5
+"""
+
+import argparse
+import html
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ssg"))
+
+from generator import ensure_fields, parse_fmd_content  # noqa: E402
+
+
+def parse_fmd_content_regex(content: str, keystr: str = '###') -> dict:
+    """Reference implementation: the regex pipeline parse_fmd used before."""
+    escaped_keystr = re.escape(keystr)
+    content = re.sub(r'<!--(?:[^-]|-(?!->))*-->', '', content)
+    pattern = fr'{escaped_keystr}\s*([^\n]+)\n(.*?)(?=\n{escaped_keystr}|\Z)'
+    matches = re.findall(pattern, content, re.DOTALL)
+    res = {key.strip(): value.strip() for key, value in matches}
+    for x in res:
+        res[x] = html.escape(res[x])
+    ensure_fields(res)
+    return res
+
+
+# contents the data tree does not have, checked on every run: header lines
+# with no key on them, where the regex backtracks into the following lines
+# for one, and headers the value of the one before runs into
+CASES = {
+    "empty header inside a value": "### a\nx\n### \ny\n### b\nz\n",
+    "empty header before a header": "### a\nx\n### \n### b\ny\n",
+    "empty header at the end": "### a\nx\n### \n",
+    "bare header before a header": "###\n### a\nx",
+    "empty header then a value line": "### \nx",
+    "blank lines after an empty header": "###\n  \n  \n### c d\n###",
+    "only newlines after a bare header": "### a\nx\n###\n\n\ny",
+    "tab after a header": "###\t\n\t\n### b\ny",
+    "four hashes": "#### a\nx\n####\n",
+    "header text inside a line": "x ### a\ny\n### b\nz",
+}
+
+
+def load_files(data_dir: str) -> dict:
+    files = {}
+    for root, dirs, names in os.walk(data_dir):
+        for name in names:
+            if name.endswith('.md'):
+                path = os.path.join(root, name)
+                with open(path, 'r', encoding='utf-8') as f:
+                    files[path] = f.read()
+    return files
+
+
+def check(files: dict) -> int:
+    mismatches = 0
+    for path, content in sorted(files.items()):
+        expected = parse_fmd_content_regex(content)
+        got = parse_fmd_content(content)
+        if got != expected or list(got) != list(expected):
+            mismatches += 1
+            print(f"MISMATCH {path}")
+            for k in sorted(set(expected) | set(got)):
+                if expected.get(k) != got.get(k):
+                    print(f"  {k}: expected {expected.get(k)!r}, got {got.get(k)!r}")
+    return mismatches
+
+
+def bench(fn, contents: list, rounds: int) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for content in contents:
+            fn(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data", help="data directory to walk (default: data)")
+    parser.add_argument("--rounds", type=int, default=5, help="benchmark rounds, best one is reported")
+    args = parser.parse_args()
+
+    files = load_files(args.data)
+    print(f"Checking {len(files)} files under {args.data} and {len(CASES)} edge cases")
+    mismatches = check(files) + check({f"<{name}>": content for name, content in CASES.items()})
+    if mismatches:
+        print(f"{mismatches} file(s) differ")
+        sys.exit(1)
+    print("All files parse identically")
+
+    contents = list(files.values())
+    t_regex = bench(parse_fmd_content_regex, contents, args.rounds)
+    t_single = bench(parse_fmd_content, contents, args.rounds)
+    print(f"regex pipeline: {t_regex * 1000:8.1f} ms  ({t_regex * 1e6 / len(contents):6.1f} us/file)")
+    print(f"single pass:    {t_single * 1000:8.1f} ms  ({t_single * 1e6 / len(contents):6.1f} us/file)")
+    print(f"speedup:        {t_regex / t_single:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Write a synthetic data/ tree in the same format and layout as the real one:
+data/authors/{bucket}/{id}.md and data/posts/{bucket}/{id}.md made of
+'### key' sections, where bucket is the id rounded up to a thousand.
+
+The output is fully determined by the options and --seed, so a dataset can
+be regenerated instead of stored.
+
+Usage:
+    python tools/synth_data.py --out /tmp/synth-10k --posts 10000
+    python tools/synth_data.py --out /tmp/synth-1m --posts 1000000 --authors 20000 \\
+        --statement-words 40 --status-mix awaiting=50,completely=25,almost=2,didnot=20,unverifiable=3
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+# the mix of the real archive
+DEFAULT_STATUS_MIX = "awaiting=58,completely=23,almost=2,didnot=15,unverifiable=1"
+STATUSES = ["awaiting", "completely", "almost", "didnot", "unverifiable"]
+
+SYLLABLES_EN = ["ka", "ro", "mi", "tan", "le", "vos", "pe", "dra", "sun", "gol", "wi", "ber", "no", "hal", "ti", "mar"]
+SYLLABLES_RU = ["ка", "ро", "ми", "тан", "ле", "вос", "пе", "дра", "сун", "гол", "ви", "бер", "но", "хал", "ти", "мар"]
+
+START_DATE = date(2014, 1, 1)
+END_DATE = date(2025, 12, 31)
+
+
+def thousand_bucket(n: int) -> int:
+    if n % 1000 == 0:
+        return n
+    return (n // 1000 + 1) * 1000
+
+
+def parse_mix(s: str) -> dict:
+    mix = {}
+    for part in s.split(","):
+        key, _, weight = part.partition("=")
+        if key not in STATUSES:
+            raise ValueError(f"unknown status {key!r}, expected one of {', '.join(STATUSES)}")
+        mix[key] = float(weight)
+    return mix
+
+
+def make_vocabulary(rnd: random.Random, syllables: list, size: int) -> list:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rnd.choice(syllables) for _ in range(rnd.randint(1, 4))))
+    return sorted(words)
+
+
+def sentence(rnd: random.Random, vocabulary: list, nwords: int) -> str:
+    n = max(1, int(rnd.gauss(nwords, nwords / 3)))
+    words = rnd.choices(vocabulary, k=n)
+    return words[0].capitalize() + " " + " ".join(words[1:]) + "."
+
+
+def random_date(rnd: random.Random, start: date, end: date) -> date:
+    return start + timedelta(days=rnd.randint(0, max(0, (end - start).days)))
+
+
+def write_fmd(path: str, fields: list):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n\n".join(f"### {key}\n{value}" for key, value in fields) + "\n")
+
+
+def author_fields(rnd: random.Random, i: int, voc_en: list, voc_ru: list) -> list:
+    name_en = " ".join(rnd.choice(voc_en).capitalize() for _ in range(2))
+    name_ru = " ".join(rnd.choice(voc_ru).capitalize() for _ in range(2))
+    return [
+        ("id", str(i)),
+        ("slug", f"{name_en.lower().replace(' ', '-')}-{i}"),
+        ("name.ru", name_ru),
+        ("description.ru", sentence(rnd, voc_ru, 3).rstrip(".")),
+        ("name.en", name_en),
+        ("description.en", sentence(rnd, voc_en, 3).rstrip(".")),
+    ]
+
+
+def post_fields(rnd: random.Random, i: int, author: int, status: str, nwords: int, voc_en: list, voc_ru: list) -> list:
+    statement = random_date(rnd, START_DATE, END_DATE)
+    awaiting = ""
+    verified = ""
+    if rnd.random() < 0.6:
+        awaiting = random_date(rnd, statement, END_DATE + timedelta(days=3650)).isoformat()
+    if status in ("completely", "almost", "didnot"):
+        verified = random_date(rnd, statement, END_DATE).isoformat()
+    context = rnd.random() < 0.7
+    title = rnd.random() < 0.1
+    return [
+        ("id", str(i)),
+        ("author-id", f"{author} <!-- synthetic -->"),
+        ("statement.ru", sentence(rnd, voc_ru, nwords)),
+        ("context.ru", sentence(rnd, voc_ru, nwords) if context else "_No response_"),
+        ("notes.ru", "1) https://example.com/" + str(i)),
+        ("title.ru", sentence(rnd, voc_ru, 4) if title else ""),
+        ("statement.en", sentence(rnd, voc_en, nwords)),
+        ("context.en", sentence(rnd, voc_en, nwords) if context else "_No response_"),
+        ("notes.en", "1) https://example.com/" + str(i)),
+        ("title.en", sentence(rnd, voc_en, 4) if title else ""),
+        ("original-language", rnd.choice(["ru", "ru", "ru", "en"])),
+        ("time-statement", statement.isoformat()),
+        ("time-awaiting", awaiting),
+        ("time-verified", verified),
+        ("status", status),
+        ("complexity", rnd.choice(["complex", "complex", "regular"])),
+        ("confidence", rnd.choice(["confident", "careful"])),
+    ]
+
+
+def generate(out: str, posts: int, authors: int, nwords: int, mix: dict, seed: int):
+    rnd = random.Random(seed)
+    voc_en = make_vocabulary(rnd, SYLLABLES_EN, 5000)
+    voc_ru = make_vocabulary(rnd, SYLLABLES_RU, 5000)
+
+    for i in range(1, authors + 1):
+        write_fmd(os.path.join(out, "authors", str(thousand_bucket(i)), f"{i}.md"), author_fields(rnd, i, voc_en, voc_ru))
+
+    # a few prolific authors and a long tail, as in the real archive
+    author_weights = [1 / (i ** 0.8) for i in range(1, authors + 1)]
+    statuses = list(mix)
+    status_weights = [mix[x] for x in statuses]
+    batch = 1000
+    for start in range(1, posts + 1, batch):
+        n = min(batch, posts + 1 - start)
+        post_authors = rnd.choices(range(1, authors + 1), weights=author_weights, k=n)
+        post_statuses = rnd.choices(statuses, weights=status_weights, k=n)
+        for i, author, status in zip(range(start, start + n), post_authors, post_statuses):
+            fields = post_fields(rnd, i, author, status, nwords, voc_en, voc_ru)
+            write_fmd(os.path.join(out, "posts", str(thousand_bucket(i)), f"{i}.md"), fields)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="directory to write (gets authors/ and posts/)")
+    parser.add_argument("--posts", type=int, default=10000, help="number of posts (default: 10000)")
+    parser.add_argument("--authors", type=int, default=None, help="number of authors (default: posts / 7)")
+    parser.add_argument("--statement-words", type=int, default=25, help="mean words per statement and context (default: 25)")
+    parser.add_argument("--status-mix", default=DEFAULT_STATUS_MIX, help=f"relative status weights (default: {DEFAULT_STATUS_MIX})")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default: 1)")
+    args = parser.parse_args()
+
+    authors = args.authors or max(1, args.posts // 7)
+    if os.path.exists(args.out) and os.listdir(args.out):
+        print(f"{args.out} is not empty", file=sys.stderr)
+        sys.exit(1)
+    generate(args.out, args.posts, authors, args.statement_words, parse_mix(args.status_mix), args.seed)
+    print(f"wrote {args.posts} posts by {authors} authors to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Validate data/posts and data/authors against the schema the generator
+expects: required and bilingual fields, status/complexity/confidence values,
+dates, file placement, and that every post's author-id has an author file.
+
+Problems that would break or corrupt the build are errors; an optional
+field filled in only one language is a warning, reported but fatal only
+with --strict.
+
+Per-file verdicts are cached by content hash in .cache/validate.json, so only
+new or changed files are parsed and checked again (in parallel); the author
+cross-references are re-checked on every run from the cached author ids.
+
+Usage:
+    python tools/validate.py
+    python tools/validate.py --data data --jobs 4 --no-cache
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ssg"))
+
+from generator import COMPLEXITIES, CONFIDENCES, LANGS, STATUSES, extract_numbers, parse_fmd_content, thousand_bucket  # noqa: E402
+
+CACHE_PATH = "./.cache/validate.json"
+# bump when the checks change, so cached verdicts are not trusted
+CACHE_VERSION = 2
+
+
+def check_date(fields, key, errors, required=False):
+    value = fields.get(key, "")
+    if value == "":
+        if required:
+            errors.append(f"{key} is empty")
+        return
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        errors.append(f"{key} {value!r} is not a YYYY-MM-DD date")
+
+
+def check_bilingual(fields, keys, errors, warnings, required=False):
+    for key in keys:
+        filled = [lang for lang in LANGS if fields.get(f"{key}.{lang}", "") != ""]
+        missing = [f"{key}.{lang}" for lang in LANGS if f"{key}.{lang}" not in fields]
+        if missing:
+            errors.append(f"missing {', '.join(missing)}")
+        elif required and len(filled) < len(LANGS):
+            errors.append(f"{key} is empty in {', '.join(x for x in LANGS if x not in filled)}")
+        elif 0 < len(filled) < len(LANGS):
+            warnings.append(f"{key} is filled only in {filled[0]}")
+
+
+def check_placement(path, fields, errors):
+    name = os.path.basename(path)
+    nf = extract_numbers(name)
+    if nf is None or name != f"{nf}.md":
+        errors.append("file name is not <id>.md")
+        return None
+    bucket = os.path.basename(os.path.dirname(path))
+    if bucket != str(thousand_bucket(int(nf))):
+        errors.append(f"id {nf} belongs in bucket {thousand_bucket(int(nf))}, not {bucket}")
+    if "id" in fields and fields["id"] != nf:
+        errors.append(f"id field {fields['id']!r} does not match the file name")
+    return nf
+
+
+def check_post(path, fields):
+    errors = []
+    warnings = []
+    check_placement(path, fields, errors)
+    if not fields.get("author-id"):
+        errors.append("author-id is missing or not a number")
+    check_bilingual(fields, ["statement"], errors, warnings, required=True)
+    check_bilingual(fields, ["context", "title"], errors, warnings)
+    for key, allowed in [("status", STATUSES), ("complexity", COMPLEXITIES), ("confidence", CONFIDENCES)]:
+        if fields.get(key) not in allowed:
+            errors.append(f"{key} {fields.get(key)!r} is not one of {', '.join(allowed)}")
+    if not re.fullmatch(r"[a-z]{2}", fields.get("original-language", "")):
+        errors.append(f"original-language {fields.get('original-language')!r} is not a two-letter language code")
+    check_date(fields, "time-statement", errors, required=True)
+    check_date(fields, "time-awaiting", errors)
+    check_date(fields, "time-verified", errors)
+    return errors, warnings
+
+
+def check_author(path, fields):
+    errors = []
+    warnings = []
+    check_placement(path, fields, errors)
+    if not fields.get("slug"):
+        errors.append("slug is empty")
+    check_bilingual(fields, ["name"], errors, warnings, required=True)
+    check_bilingual(fields, ["description"], errors, warnings)
+    return errors, warnings
+
+
+def check_file(job):
+    """(path, kind, cached hash) -> (path, hash, errors, warnings, author-id),
+    with None for the verdict when the content still has the cached hash;
+    runs in a worker."""
+    path, kind, cached = job
+    with open(path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha1(raw).hexdigest()
+    if digest == cached:
+        return path, digest, None, None, None
+    try:
+        fields = parse_fmd_content(raw.decode('utf-8'))
+    except UnicodeDecodeError as e:
+        return path, digest, [f"not UTF-8: {e}"], [], None
+    errors, warnings = check_post(path, fields) if kind == "posts" else check_author(path, fields)
+    return path, digest, errors, warnings, fields.get("author-id") if kind == "posts" else None
+
+
+def list_files(data_dir):
+    files = {}
+    for kind in ("posts", "authors"):
+        for root, dirs, names in os.walk(os.path.join(data_dir, kind)):
+            for name in names:
+                if name.endswith(".md"):
+                    files[os.path.join(root, name)] = kind
+    return files
+
+
+def load_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get("version") == CACHE_VERSION:
+            return cache["files"]
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_cache(files, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({"version": CACHE_VERSION, "files": files}, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(f"{path}.tmp", path)
+
+
+def validate(data_dir, cache, jobs):
+    """Returns ({path: [errors]}, {path: [warnings]}, number of files checked);
+    cache is updated in place."""
+    files = list_files(data_dir)
+    todo = []
+    for path, kind in sorted(files.items()):
+        st = os.stat(path)
+        entry = cache.get(path)
+        # size and mtime unchanged: trust the cached verdict without reading;
+        # otherwise (an edit, or a fresh checkout) compare the content hash
+        if entry is None or entry["size"] != st.st_size or entry["mtime"] != st.st_mtime_ns:
+            todo.append((path, kind, entry["hash"] if entry else None))
+    for path in [p for p in cache if p not in files]:
+        del cache[path]
+
+    if jobs > 1 and len(todo) > 64:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            results = list(ex.map(check_file, todo, chunksize=64))
+    else:
+        results = [check_file(job) for job in todo]
+    checked = 0
+    for path, digest, errors, warnings, author in results:
+        st = os.stat(path)
+        if errors is None:
+            cache[path].update(size=st.st_size, mtime=st.st_mtime_ns)
+            continue
+        checked += 1
+        cache[path] = {"hash": digest, "size": st.st_size, "mtime": st.st_mtime_ns, "errors": errors, "warnings": warnings, "author": author}
+
+    problems = {path: list(entry["errors"]) for path, entry in cache.items() if entry["errors"]}
+    warnings = {path: entry["warnings"] for path, entry in cache.items() if entry["warnings"]}
+    authors = {extract_numbers(os.path.basename(p)) for p, kind in files.items() if kind == "authors"}
+    for path, kind in files.items():
+        author = cache[path]["author"]
+        if kind == "posts" and author and author not in authors:
+            problems.setdefault(path, []).append(f"author-id {author} has no file in {os.path.join(data_dir, 'authors')}")
+    return problems, warnings, checked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data", help="data directory (default: data)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument("--cache", default=CACHE_PATH, help=f"verdict cache (default: {CACHE_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="check every file and leave the cache alone")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings too")
+    args = parser.parse_args()
+
+    cache = {} if args.no_cache else load_cache(args.cache)
+    problems, warnings, checked = validate(args.data, cache, args.jobs)
+    if not args.no_cache:
+        save_cache(cache, args.cache)
+
+    for path in sorted(problems.keys() | warnings.keys()):
+        for error in problems.get(path, []):
+            print(f"{path}: error: {error}")
+        for warning in warnings.get(path, []):
+            print(f"{path}: warning: {warning}")
+    print(f"{len(cache)} files, {checked} checked, {len(problems)} with errors, {len(warnings)} with warnings")
+    if problems or (args.strict and warnings):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
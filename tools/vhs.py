@@ -3,13 +3,24 @@
 Script to fetch a markdown file from a GitHub-hosted folder and run yt-dlp
 for a time segment found on the first line that contains a link and a time range.
 
+Batch mode reads the posts from the local data/posts tree instead, runs
+yt-dlp for many posts through a bounded worker pool and records finished
+clips in a manifest, so a rerun skips them and retries the failed ones.
+
 Usage:
     python vhs.py 3213
+    python vhs.py 3200-3213 1500,1502 --jobs 4 --out clips
+    python vhs.py --all --out clips
 """
 
+import argparse
+import json
+import os
 import re
 import sys
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, Tuple
 from urllib import request, error
 
@@ -97,7 +108,158 @@ def build_yt_dlp_cmd(n: int, url: str, start: str, end: str) -> list:
     return cmd
 
 
+def parse_ids(specs: list) -> list:
+    """'3213', '3200-3213' and '1500,1502' -> sorted unique post ids."""
+    ids = set()
+    for spec in specs:
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            lo, sep, hi = part.partition("-")
+            try:
+                if sep:
+                    ids.update(range(int(lo), int(hi) + 1))
+                else:
+                    ids.add(int(part))
+            except ValueError:
+                raise ValueError(f"bad post id or range: {part!r}")
+    return sorted(ids)
+
+
+def local_md_path(data_dir: str, n: int) -> str:
+    return os.path.join(data_dir, str(thousand_bucket(n)), f"{n}.md")
+
+
+def local_post_ids(data_dir: str) -> list:
+    ids = []
+    for root, dirs, names in os.walk(data_dir):
+        for name in names:
+            if name.endswith(".md") and name[:-3].isdigit():
+                ids.append(int(name[:-3]))
+    return sorted(ids)
+
+
+def load_manifest(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest: dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def plan_clips(ids: list, data_dir: str, out_dir: str, manifest: dict, skip_missing: bool) -> Tuple[list, int]:
+    """Clips still to download as (id, url, start, end, output path), and the
+    number of posts skipped because their clip is already in the manifest."""
+    jobs = []
+    done = 0
+    for n in ids:
+        path = local_md_path(data_dir, n)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                md = f.read()
+        except OSError:
+            if not skip_missing:
+                print(f"{n}: no {path}")
+            continue
+        url, start, end = find_first_url_and_timerange(md)
+        if url is None:
+            if not skip_missing:
+                print(f"{n}: no URL + time range")
+            continue
+        out = os.path.join(out_dir, f"{n}.mp4")
+        entry = manifest.get(str(n))
+        # a clip is done while its source and range are unchanged and the file is there
+        if entry and entry.get("status") == "done" and (entry["url"], entry["start"], entry["end"]) == (url, start, end) and os.path.exists(out):
+            done += 1
+            continue
+        jobs.append((n, url, start, end, out))
+    return jobs, done
+
+
+def download_clip(n: int, url: str, start: str, end: str, out: str) -> Tuple[int, str]:
+    cmd = build_yt_dlp_cmd(n, url, start, end)
+    cmd[cmd.index("-o") + 1] = out
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    err = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else ""
+    return proc.returncode, err
+
+
+def run_batch(args):
+    try:
+        ids = local_post_ids(args.data) if args.all else parse_ids(args.ids)
+    except ValueError as e:
+        print(e)
+        sys.exit(2)
+    manifest_path = args.manifest or os.path.join(args.out, "manifest.json")
+    manifest = load_manifest(manifest_path)
+    jobs, done = plan_clips(ids, args.data, args.out, manifest, skip_missing=args.all)
+    print(f"{len(jobs)} clip(s) to download, {done} already done")
+    if args.dry_run:
+        for n, url, start, end, out in jobs:
+            cmd = build_yt_dlp_cmd(n, url, start, end)
+            cmd[cmd.index("-o") + 1] = out
+            print(' '.join(f'"{c}"' if ' ' in c else c for c in cmd))
+        return
+    os.makedirs(args.out, exist_ok=True)
+
+    lock = threading.Lock()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.jobs) as ex:
+        futures = {ex.submit(download_clip, *job): job for job in jobs}
+        for fut in as_completed(futures):
+            n, url, start, end, out = futures[fut]
+            try:
+                code, err = fut.result()
+            except OSError as e:
+                code, err = -1, str(e)
+            prev = manifest.get(str(n), {})
+            entry = {"url": url, "start": start, "end": end, "file": os.path.basename(out),
+                     "attempts": prev.get("attempts", 0) + 1}
+            if code == 0:
+                entry["status"] = "done"
+                print(f"{n}: done")
+            else:
+                entry["status"] = "failed"
+                entry["error"] = err or f"yt-dlp exit code {code}"
+                failed += 1
+                print(f"{n}: failed: {entry['error']}")
+            # the manifest is rewritten after every clip so an interrupted run resumes
+            with lock:
+                manifest[str(n)] = entry
+                save_manifest(manifest, manifest_path)
+    print(f"{len(jobs) - failed} downloaded, {failed} failed, manifest: {manifest_path}")
+    if failed:
+        sys.exit(1)
+
+
 def main():
+    # a single bare id keeps the original behaviour: fetch from GitHub, run yt-dlp in the foreground
+    if len(sys.argv) == 2 and not sys.argv[1].startswith("-") and sys.argv[1].isdigit():
+        return main_single()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("ids", nargs="*", help="post ids, ranges (3200-3213) or comma-separated lists")
+    parser.add_argument("--all", action="store_true", help="every post in --data with a URL + time range")
+    parser.add_argument("--data", default="data/posts", help="local posts tree (default: data/posts)")
+    parser.add_argument("--out", default="clips", help="output directory for <id>.mp4 (default: clips)")
+    parser.add_argument("--manifest", default=None, help="manifest path (default: <out>/manifest.json)")
+    parser.add_argument("--jobs", "-j", type=int, default=4, help="concurrent yt-dlp processes (default: 4)")
+    parser.add_argument("--dry-run", action="store_true", help="print the yt-dlp commands without running them")
+    args = parser.parse_args()
+    if not args.ids and not args.all:
+        parser.error("give post ids or --all")
+    run_batch(args)
+
+
+def main_single():
     if len(sys.argv) != 2:
         print("Usage: python yt_dlp_from_github.py <number>")
         sys.exit(2)